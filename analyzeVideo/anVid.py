@@ -116,6 +116,8 @@ class AnVidFrame(wx.Frame):
         self.panel = {} # panels
         self.timer = {} # timers
         self.timer["sb"] = None # timer for statusbar
+        self.timer["sld"] = None # timer for applying slider values
+        self.sldVal2apply = {} # slider values, waiting to be applied
         self.session_start_time = -1
         self.runningDur = 0 # accumulated duration (sec.) of continuous running
         self.logFP = path.join(FPATH, "log.txt")
@@ -828,7 +830,28 @@ class AnVidFrame(wx.Frame):
         # number of container changes will be applied by separate buttons
         if objName in ["uCCols_sld", "uCRows_sld"]: return 
 
-        self.applyChangedParam(objName, objVal)
+        ### apply the value(s) when the slider stopped for a moment;
+        ###   applying (processing frame image & saving config) on every 
+        ###   slider event is too heavy while dragging it.
+        self.sldVal2apply[objName] = objVal
+        if self.timer["sld"] != None: self.timer["sld"].Stop()
+        self.timer["sld"] = wx.CallLater(50, self.applySliderValues)
+
+    #---------------------------------------------------------------------------
+
+    def applySliderValues(self):
+        """ Apply slider values, stored in onSlider.
+        
+        Args: None
+        
+        Returns: None
+        """
+        if FLAGS["debug"]: MyLogger.info(str(locals()))
+
+        self.timer["sld"] = None
+        sldVal = self.sldVal2apply
+        self.sldVal2apply = {}
+        for wn, wVal in sldVal.items(): self.applyChangedParam(wn, wVal)
 
     #---------------------------------------------------------------------------
 
@@ -41,7 +41,7 @@ v.0.3.202010: Developing a version for observing ants.
 import sys, queue, pickle
 from threading import Thread
 from platform import uname
-from os import path, mkdir
+from os import path, mkdir, cpu_count
 from copy import copy
 from time import time, sleep
 from datetime import datetime, timedelta
@@ -53,6 +53,8 @@ from queue import Queue
 import wx, wx.adv, cv2
 import wx.lib.scrolledpanel as SPanel 
 
+cv2.setUseOptimized(True) # use optimized code (SSE/AVX, IPP) of OpenCV
+
 _path = path.realpath(__file__)
 FPATH = path.split(_path)[0] # path of where this Python file is
 sys.path.append(FPATH) # add FPATH to path
@@ -95,6 +97,12 @@ for mn in FLAG_MOD.keys():
 
 DEBUG = False 
 __version__ = "0.3.202301"
+### key codes allowed in number-only wx.TextCtrl;
+###   numbers, backsapce, delete, left, right
+###   and tab (for hopping between TextCtrls)
+NUM_ONLY_KEYCODES = frozenset([ord(str(x)) for x in range(10)] + 
+                              [wx.WXK_BACK, wx.WXK_DELETE, wx.WXK_TAB,
+                               wx.WXK_LEFT, wx.WXK_RIGHT])
 
 #===============================================================================
 
@@ -134,7 +142,11 @@ class CATOSFrame(wx.Frame):
         ##### [begin] setting up attributes -----
         self.expmtTypes = ["antObservation2020"]
         self.expmtType = self.expmtTypes[-1]
+        # file path of configuration file of the current experiment type
+        self.configFP = path.join(FPATH, "config_%s"%(self.expmtType))
         self.btnImgDir = path.join(P_DIR, "image")
+        # click sound; loaded once to play on each button press
+        self.clickSnd = wx.adv.Sound(path.join(P_DIR, "sound", "snd_click.wav"))
         self.cTags = ["ants", "focalAntMarker"] # tags of colors to track
         configV = self.config("load") # load configuration values
         self.configV = configV
@@ -186,15 +198,23 @@ class CATOSFrame(wx.Frame):
                          audioOut=None)
         self.program_start_time = time()
         self.isChkCamViewOn = False # checking camera view is on/off
+        # last time an error in displaying a frame was reported
+        self.frameErrTime = -1 
         self.mlWid = [] # wx widgets in middle left panel 
+        self.widgets = {} # named wx widgets; key is the widget name
         self.vOut = {} # video out (on-screen) info
         self.hsv = {} # current HSV values to find
+        # HSV slider name -> (cTag, ck, mm); to avoid parsing the name string
+        #   on every slider event
+        self.hsvSldKey = {}
         for cTag in self.cTags:
             self.hsv[cTag] = {}
             for ck in ["H", "S", "V"]:
                 self.hsv[cTag][ck] = {}
                 for mm in ["Min", "Max"]:
-                    self.hsv[cTag][ck][mm] = configV[f'c-{cTag}-{ck}-{mm}_sld']
+                    wn = f'c-{cTag}-{ck}-{mm}_sld'
+                    self.hsv[cTag][ck][mm] = configV[wn]
+                    self.hsvSldKey[wn] = (cTag, ck, mm)
         ##### [end] setting up attributes ----- 
 
         btnSz = (35, 35)
@@ -252,14 +272,15 @@ class CATOSFrame(wx.Frame):
                     ])
             if w != []:
                 self.gbs[pk] = wx.GridBagSizer(0,0) 
-                addWxWidgets(w, self, pk) 
+                wLst, _ = addWxWidgets(w, self, pk) 
+                self.storeWidgets(wLst)
                 self.panel[pk].SetSizer(self.gbs[pk])
                 self.gbs[pk].Layout()
                 self.panel[pk].SetupScrolling()
 
         self.initMLWidgets() # init middle left side panel
-        self.pTime_txt = wx.FindWindowByName("pStart_txt", self.panel["tp"])
-        self.sTime_txt = wx.FindWindowByName("sStart_txt", self.panel["tp"])
+        self.pTime_txt = self.widgets["pStart_txt"]
+        self.sTime_txt = self.widgets["sStart_txt"]
 
         ### keyboard binding
         quitId = wx.NewIdRef(count=1)
@@ -275,7 +296,10 @@ class CATOSFrame(wx.Frame):
         self.Bind(wx.EVT_TIMER, self.onTimer, self.timer["reg"])
         self.timer["reg"].Start(100)
 
-        self.Bind( wx.EVT_CLOSE, self.onClose )
+        ### events bound to this frame (bind each only once);
+        ###   EVT_CLOSE -> onClose (top of __init__)
+        ###   EVT_MENU (quitId) -> onClose
+        ###   EVT_TIMER (self.timer["reg"]) -> onTimer
 
         self.log("Beginning of the program.")
 
@@ -333,6 +357,7 @@ class CATOSFrame(wx.Frame):
         
         for i, w in enumerate(self.mlWid): # through widgets in the panel
             try:
+                self.widgets.pop(w.GetName(), None)
                 self.gbs[pk].Detach(w) # detach 
                 w.Destroy() # destroy
             except:
@@ -481,17 +506,37 @@ class CATOSFrame(wx.Frame):
            
         self.gbs[pk] = wx.GridBagSizer(0,0) 
         self.mlWid, pSz = addWxWidgets(w, self, pk)
+        self.storeWidgets(self.mlWid)
         if pSz[0] > self.pi[pk]["sz"][0]:
             self.panel[pk].SetSize(pSz[0], self.pi[pk]["sz"][1])
         self.panel[pk].SetSizer(self.gbs[pk])
         self.gbs[pk].Layout()
         self.panel[pk].SetupScrolling()
 
-        self.sessionStartSTxt = wx.FindWindowByName("sessionStart_sTxt",
-                                                    self.panel["ml"])
+        self.sessionStartSTxt = self.widgets["sessionStart_sTxt"]
     
     #---------------------------------------------------------------------------
 
+    def storeWidgets(self, wLst):
+        """ Store named widgets in self.widgets to access them 
+        without searching with wx.FindWindowByName.
+
+        Args:
+            wLst (list): List of widgets, made with addWxWidgets.
+
+        Returns:
+            None
+        """
+        if DEBUG: MyLogger.info(str(locals()))
+
+        for w in wLst:
+            wn = w.GetName()
+            # widgets without given name have wx's default name 
+            #   such as 'staticText'
+            if "_" in wn: self.widgets[wn] = w
+
+    #---------------------------------------------------------------------------
+
     def startMods(self, mod='all', modArgs={}):
         """ start modules
 
@@ -548,6 +593,7 @@ class CATOSFrame(wx.Frame):
                     self.vOut["imgH"] = ch
                     cRow = 0 # row index for cam view
                     cCol = 0 # column index for cam view
+                    maxNPx = 0 # max. number of pixels in a frame
                     for cIdx in self.chosenCamIdx: # go through cam indices
                         # init videoIn module
                         if cIdx == self.raspCSICamIdx:
@@ -558,6 +604,14 @@ class CATOSFrame(wx.Frame):
                                           fpsLimit=modArgs["videoInFPSLimit"]) 
                             else:
                                 viMod = VideoIn(self, cIdx) 
+                        if cIdx == self.raspCSICamIdx: fSz = viMod.res
+                        else: fSz = getattr(viMod, "fSz", None)
+                        if fSz is None:
+                        # the camera failed to read its first frame
+                            self.log("Cam-%i failed to init.; skipped."%(cIdx))
+                            viMod.close()
+                            continue
+                        maxNPx = max(maxNPx, fSz[0]*fSz[1])
                         q2t = queue.Queue() # queue from main to thread
                         args = (self.q2m, q2t, self.outputFP,)
                         # thread of running the module
@@ -575,6 +629,25 @@ class CATOSFrame(wx.Frame):
                         self.mods["videoIn"][cIdx].thrd = thrd
                         self.mods["videoIn"][cIdx].q2t = q2t
                         self.mods["videoIn"][cIdx].sBmp = sBmp 
+                        # buffers for displaying frame image (reused for 
+                        #   every frame, instead of allocating new arrays)
+                        self.mods["videoIn"][cIdx].dispBuf = dict(
+                                bgr=np.empty((ch, cw, 3), dtype=np.uint8),
+                                rgb=np.empty((ch, cw, 3), dtype=np.uint8),
+                                dstSz=(cw, ch), # display size
+                                srcShape=None, # frame shape to resize from
+                                resize=None # how to resize (getResizeMethod)
+                                )
+                    ### number of threads for OpenCV functions;
+                    ###   with small frames, overhead of running threads
+                    ###   outweighs the gain and they compete with 
+                    ###   the camera threads.
+                    if maxNPx < 500000: nThr = 1
+                    else: nThr = cpu_count() or 1
+                    cv2.setNumThreads(nThr)
+                    msg = "OpenCV optimized: %s"%(str(cv2.useOptimized()))
+                    msg += ", number of threads: %i"%(cv2.getNumThreads())
+                    self.log(msg)
                     self.tmpWaitingMsgPanel.Destroy() # destroy tmp. panel
 
                 # start VideoIn with delay 
@@ -620,20 +693,39 @@ class CATOSFrame(wx.Frame):
         else:
             mods = [mod]
 
+        ### send quit signal to all modules first, 
+        ###   so that they finish in parallel
         for mk in mods:
-            ### close the mod.
             if mk == "videoIn":
+                # (q2t is unbounded; put_nowait never raises queue.Full)
                 for viK in self.mods[mk].keys():
-                    self.mods[mk][viK].q2t.put("quit", True, None)
-                    self.mods[mk][viK].thrd.join()
-                    self.mods[mk][viK].sBmp.Destroy()
-                    wx.CallLater(10, self.mods[mk][viK].close)
-                    #wx.CallLater(1000, self.mods[mk][viK].thrd.join)
-                self.mods[mk] = {}
+                    self.mods[mk][viK].q2t.put_nowait("quit")
             elif mk == "audioIn":
                 if self.mods[mk] != None:
                     self.mods[mk].log_q.put('main/quit/True', True, None)
                     self.mods[mk] = None 
+
+        for mk in mods:
+            ### close the mod.
+            if mk == "videoIn":
+                # wait at most 5 seconds for all camera threads together
+                deadline = time() + 5
+                for viK in self.mods[mk].keys():
+                    viMod = self.mods[mk][viK]
+                    viMod.thrd.join(timeout=max(0, deadline-time()))
+                    viMod.sBmp.Destroy()
+                    if viMod.thrd.is_alive():
+                    # thread is stalled (e.g.: blocked in reading a frame);
+                    #   don't freeze UI waiting for it, and don't release
+                    #   the capture, which the thread is still using
+                        msg = "Thread of Cam-%.2i did not finish."%(viK)
+                        self.log(msg, self.classTag)
+                        continue
+                    wx.CallLater(10, viMod.close)
+                    #wx.CallLater(1000, self.mods[mk][viK].thrd.join)
+                self.mods[mk] = {}
+            elif mk == "audioIn":
+                pass # quit message was sent above
             else:
                 if self.mods[mk] != None:
                     self.mods[mk].close()
@@ -658,10 +750,10 @@ class CATOSFrame(wx.Frame):
         flag_term, obj, objName, wasFuncCalledViaWxEvent, objVal = ret
         if flag_term: return
 
-        wxSndPlay(path.join(P_DIR, "sound", "snd_click.wav"))
+        wxSndPlay(self.clickSnd)
 
         if objName in ["addCam_btn", "remCam_btn"]:
-            cho = wx.FindWindowByName("camIdx_cho", self.panel["tp"])
+            cho = self.widgets["camIdx_cho"]
             chosenCamIdx = int(cho.GetString(cho.GetSelection()))
             if objName == "addCam_btn":
                 if not chosenCamIdx in self.chosenCamIdx:
@@ -669,7 +761,7 @@ class CATOSFrame(wx.Frame):
             elif objName == "remCam_btn":
                 if chosenCamIdx in self.chosenCamIdx:
                     self.chosenCamIdx.remove(chosenCamIdx)
-            sTxt = wx.FindWindowByName("chosenCamIdx_txt", self.panel["tp"])
+            sTxt = self.widgets["chosenCamIdx_txt"]
             sTxt.SetValue(str(self.chosenCamIdx))
         
         if objName == "chkCamView_btn":
@@ -739,6 +831,7 @@ class CATOSFrame(wx.Frame):
         if objName == "expmtType_cho":
             if objVal != self.expmtType:
                 self.expmtType = objVal # store experiment type
+                self.configFP = path.join(FPATH, "config_%s"%(objVal))
                 self.initMLWidgets() # set up middle left panel
 
         elif objName == "numROIs_cho":
@@ -794,9 +887,8 @@ class CATOSFrame(wx.Frame):
         flag_term, obj, objName, wasFuncCalledViaWxEvent, objVal = ret 
         if flag_term: return
 
-        if objName.startswith("c-"):
-            _, cTag, ck, mm = objName.split("-")
-            mm = mm.rstrip("_sld")
+        if objName in self.hsvSldKey:
+            cTag, ck, mm = self.hsvSldKey[objName]
             # update the current HSV color value
             self.hsv[cTag][ck][mm] = objVal
 
@@ -852,12 +944,7 @@ class CATOSFrame(wx.Frame):
 
         if isNumOnly:
             keyCode = event.GetKeyCode()
-            ### Allow numbers, backsapce, delete, left, right
-            ###   and tab (for hopping between TextCtrls)
-            allowed = [ord(str(x)) for x in range(10)]
-            allowed += [wx.WXK_BACK, wx.WXK_DELETE, wx.WXK_TAB]
-            allowed += [wx.WXK_LEFT, wx.WXK_RIGHT]
-            if keyCode in allowed:
+            if keyCode in NUM_ONLY_KEYCODES:
                 event.Skip()
                 return
 
@@ -882,33 +969,41 @@ class CATOSFrame(wx.Frame):
 
         if self.pressedPipette != "":
             cTag = self.pressedPipette.split("-")[1]
-            img = convt_wxImg2cvImg(sBmp.Bitmap, fromBMP=True)
-            b, g, r = img[mp[1], mp[0]] # get color value of the clicked pixel
-            col = {}
-            # convert it to HSV value
-            col["H"], col["S"], col["V"] = rgb2cvHSV(r, g, b)
-            ### set slider bars to HSV value
-            for ck in ["H", "S", "V"]:
-                if ck == "H":
-                    maxVal = 180
-                    diff = 10
-                else:
-                    maxVal = 255
-                    diff = 25
-                for mm in ["Min", "Max"]: # HSV min & max values
-                    if mm == "Min": _col = max(0, col[ck]-diff)
-                    elif mm == "Max": _col = min(maxVal, col[ck]+diff)
-                    ### set slider value
-                    sN = "c-%s-%s-%s_sld"%(cTag, ck, mm)
-                    sld = wx.FindWindowByName(sN, self.panel["ml"])
-                    sld.SetValue(_col)
-                    # store the current HSV values
-                    self.hsv[cTag][ck][mm] = _col
+            ### the displayed image of the clicked StaticBitmap
+            ###   (RGB buffer, written in displayCamFrame)
+            dispBuf = None
+            for viMod in self.mods["videoIn"].values():
+                if viMod.sBmp is sBmp: dispBuf = viMod.dispBuf; break
+            x, y = mp[0], mp[1]
+            # whether the clicked pixel is in the displayed image
+            flagInImg = False
+            if dispBuf is not None and dispBuf["srcShape"] is not None:
+                iH, iW = dispBuf["rgb"].shape[:2]
+                flagInImg = (0 <= x < iW) and (0 <= y < iH)
+            if flagInImg:
+                # convert the clicked pixel to HSV value with OpenCV, 
+                #   so that it matches the HSV values used for thresholding
+                col = cv2.cvtColor(dispBuf["rgb"][y:y+1, x:x+1], 
+                                   cv2.COLOR_RGB2HSV)[0,0].astype(np.int16)
+                diff = np.array([10, 25, 25]) # allowed difference of H, S, V
+                maxVal = np.array([180, 255, 255]) # max. values of H, S, V
+                ### HSV min & max values
+                hsvMM = dict(Min=np.maximum(col-diff, 0),
+                             Max=np.minimum(col+diff, maxVal))
+                ### set slider bars to HSV value
+                for mm in ["Min", "Max"]:
+                    for i, ck in enumerate(["H", "S", "V"]):
+                        _col = int(hsvMM[mm][i])
+                        ### set slider value
+                        sN = "c-%s-%s-%s_sld"%(cTag, ck, mm)
+                        self.widgets[sN].SetValue(_col)
+                        # store the current HSV values
+                        self.hsv[cTag][ck][mm] = _col
             
             ### init
             cursor = wx.Cursor(wx.CURSOR_ARROW)
             self.panel["mr"].SetCursor(cursor)
-            btn = wx.FindWindowByName(f'pipette-{cTag}_btn', self.panel["ml"])
+            btn = self.widgets[f'pipette-{cTag}_btn']
             btn.SetBackgroundColour("#333333")
             self.pressedPipette = ""
 
@@ -926,53 +1021,62 @@ class CATOSFrame(wx.Frame):
         """
         #if DEBUG: MyLogger.info(str(locals()))
         
-        ### update log file path, if necessary
-        d = path.basename(self.logFP).split("_")[-1] # date in log file
-        _d = '%.2i'%(datetime.now().day) # current date
-        if d != _d: self.setLogFP() 
+        # update log file path, if date changed
+        if datetime.now().day != self.logDay: self.setLogFP() 
         
         ### update several running time
+        ###   (only when the displayed seconds change; SetValue generates
+        ###   wx.EVT_TEXT and repaints the text box)
         e_time = time() - self.program_start_time
-        self.pTime_txt.SetValue(
-                str(timedelta(seconds=e_time)).split('.')[0]
-                )
+        tStr = str(timedelta(seconds=int(e_time)))
+        if tStr != self.pTime_txt.GetValue(): self.pTime_txt.SetValue(tStr)
         sMMod = self.mods["sessionMngr"]
         if sMMod != None and sMMod.sessionStartTime != -1:
             e_time = time() - sMMod.sessionStartTime
-            self.sTime_txt.SetValue(
-                    str(timedelta(seconds=e_time)).split('.')[0]
-                    )
+            tStr = str(timedelta(seconds=int(e_time)))
+            if tStr != self.sTime_txt.GetValue(): self.sTime_txt.SetValue(tStr)
+        
+        if self.q2m.empty(): return # no data from threads
         
         ##### [begin] processing message -----
         ### Receive data from queue
-        ### * if it's "displayMsg", keep receiving until getting 
-        ###   the last queued message.
-        ### * if the received data is other type than a simple message, 
-        ###   then process it.
-        rData = None
-        while True:
-            ret = receiveDataFromQueue(self.q2m)
-            if ret == None:
-                break
-            else:
-                rData = ret # store received data
-                if ret[0] != "displayMsg": break 
-        if rData == None: return
-
-        if rData[0] == "displayMsg":
-            showStatusBarMsg(self, rData[1], -1)
-            return
-        
-        elif rData[0].startswith("finished"):
-            self.callback(rData, flag)
-        
-        elif rData[0] == "frameImg":
-            cIdx = rData[1]
-            frame = rData[2]
-            if cIdx in self.mods["videoIn"].keys():
-                # store the frame image
-                self.mods["videoIn"][cIdx].frame = frame
-                if self.isChkCamViewOn: self.displayCamFrame(cIdx, frame)
+        ### * drain only as many items as were queued at this point, 
+        ###   so that this loop is bounded while threads keep putting data.
+        ### * if it's "displayMsg", only the last one is displayed.
+        ### * other types of data are processed in the received order.
+        dispMsg = None
+        for _ in range(self.q2m.qsize()):
+            try: rData = self.q2m.get_nowait()
+            except queue.Empty: break
+
+            if rData[0] == "displayMsg":
+                dispMsg = rData[1]
+            
+            elif rData[0].startswith("finished"):
+                self.callback(rData, flag)
+            
+            elif rData[0] == "frameImg":
+                cIdx = rData[1]
+                frame = rData[2]
+                if cIdx in self.mods["videoIn"].keys():
+                    viMod = self.mods["videoIn"][cIdx]
+                    # let the thread send its next frame
+                    viMod.flagFrameQueued = False
+                    # store the frame image
+                    viMod.frame = frame
+                    if self.isChkCamViewOn:
+                        try: 
+                            self.displayCamFrame(cIdx, frame)
+                        except Exception as e:
+                            ### report at most once in 10 seconds; 
+                            ###   an error repeating on every frame 
+                            ###   shouldn't flood output and stall UI.
+                            if time()-self.frameErrTime > 10:
+                                self.frameErrTime = time()
+                                MyLogger.exception(
+                                    "Failed to display frame: %s"%(str(e)))
+
+        if dispMsg != None: showStatusBarMsg(self, dispMsg, -1)
         ##### [end] processing message ----- 
 
     #---------------------------------------------------------------------------
@@ -990,9 +1094,27 @@ class CATOSFrame(wx.Frame):
         if DEBUG: MyLogger.info(str(locals()))
 
         viMod = self.mods["videoIn"][cIdx]
-        imgW = self.vOut["imgW"]
-        imgH = self.vOut["imgH"]
-        frame = cv2.resize(frame, (imgW,imgH)) # resize to display
+        dispBuf = viMod.dispBuf
+        imgW, imgH = dispBuf["dstSz"]
+        if frame.shape != dispBuf["srcShape"]:
+        # frame shape changed (or first frame); determine how to resize
+            dispBuf["srcShape"] = frame.shape
+            dispBuf["resize"] = getResizeMethod(
+                                    (frame.shape[1], frame.shape[0]),
+                                    dispBuf["dstSz"]
+                                    )
+        ### resize to display (into the pre-allocated buffer)
+        rm = dispBuf["resize"]
+        if rm == "copy": # frame is already in the display size
+            np.copyto(dispBuf["bgr"], frame)
+            frame = dispBuf["bgr"]
+        elif rm == "pyrDown":
+            frame = cv2.pyrDown(frame, dst=dispBuf["bgr"])
+        elif rm == "pyrDown2":
+            frame = cv2.pyrDown(cv2.pyrDown(frame), dst=dispBuf["bgr"])
+        else:
+            frame = cv2.resize(frame, (imgW,imgH), dst=dispBuf["bgr"],
+                               interpolation=rm)
         ### write info. string on frame
         cv2.putText(frame, # image
                     "Cam-%.2i"%(cIdx), # string
@@ -1002,10 +1124,10 @@ class CATOSFrame(wx.Frame):
                     (0,50,100), # color
                     1) # thickness
         ### display frame image on corresponding StaticBitmap 
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = wx.Image(imgW, imgH)
-        img.SetData(frame.tobytes())
-        viMod.sBmp.SetBitmap(img.ConvertToBitmap())
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dispBuf["rgb"])
+        # make bitmap directly from the RGB buffer 
+        #   (without bytes copy and wx.Image conversion)
+        viMod.sBmp.SetBitmap(wx.Bitmap.FromBuffer(imgW, imgH, frame))
 
     #---------------------------------------------------------------------------
     
@@ -1039,6 +1161,7 @@ class CATOSFrame(wx.Frame):
         ts = get_time_stamp().split("_")
         logFN = "log_%s%s%s.txt"%(ts[0], ts[1], ts[2]) # log_yyyymmdd
         self.logFP = path.join(self.outputFP, logFN)
+        self.logDay = int(ts[2]) # day of the current log file
 
     #---------------------------------------------------------------------------
     
@@ -1077,7 +1200,7 @@ class CATOSFrame(wx.Frame):
         """
         if DEBUG: MyLogger.info(str(locals()))
         
-        configFP = path.join(FPATH, "config_%s"%(self.expmtType))
+        configFP = self.configFP
 
         ### default values of widgets
         defV = {"initSessionDelay_txt":1,
@@ -1107,24 +1230,34 @@ class CATOSFrame(wx.Frame):
         if operation == "save":
             config = {}
             if self.expmtType == "antObservation2020":
-                for wn in defV.keys(): 
-                    w = wx.FindWindowByName(wn, self.panel["ml"])
+                for wn, dVal in defV.items(): 
+                    w = self.widgets.get(wn) 
+                    if w is None:
+                    # widget doesn't exist (such as ROI text-box with 
+                    #   smaller number of ROIs); keep the previous value
+                        config[wn] = self.configV.get(wn, dVal)
+                        continue
                     val = widgetValue(w) # get the widget value 
-                    nVal = str2num(val)
-                    if nVal is not None: val = nVal
+                    # cast to the type of its default value
+                    try: 
+                        val = type(dVal)(val)
+                    except ValueError:
+                    # invalid value; keep the previous value and report it
+                        pVal = self.configV.get(wn, dVal)
+                        msg = "Invalid value of %s, '%s', "%(wn, str(val))
+                        msg += "was not saved; kept '%s'."%(str(pVal))
+                        self.log(msg)
+                        val = pVal
                     config[wn] = val
-            fh = open(configFP, "wb")
-            pickle.dump(config, fh)
-            fh.close()
+            with open(configFP, "wb") as fh:
+                pickle.dump(config, fh, protocol=pickle.HIGHEST_PROTOCOL)
             return
         
         elif operation == "load":
             if not path.isfile(configFP):
                 configV = defV
             else:
-                fh = open(configFP, "rb")
-                configV = pickle.load(fh)
-                fh.close()
+                with open(configFP, "rb") as fh: configV = pickle.load(fh)
                 for k in defV.keys():
                     if not k in configV.keys():
                         configV[k] = defV[k]
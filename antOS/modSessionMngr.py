@@ -119,6 +119,9 @@ class ESessionManager:
             writeFile(self.rsltFP[roiIdx], header)
 
         ### init some variables
+        # copy of the current frame image of each camera; allocated once
+        #   and overwritten at each frame processing
+        self.frameBuf = {}
         self.prev_grey = {} # greyscale image of the previous frame
         for ci in p.chosenCamIdx:
             self.prev_grey[ci] = []
@@ -270,7 +273,12 @@ class ESessionManager:
             viMod = p.mods["videoIn"][ci]
             if not hasattr(viMod, "frame"): continue
             params = self.params[ci]
-            origFrame = viMod.frame.copy() # get frame image
+            ### get frame image
+            if ci not in self.frameBuf or \
+              self.frameBuf[ci].shape != viMod.frame.shape:
+                self.frameBuf[ci] = np.empty_like(viMod.frame)
+            origFrame = self.frameBuf[ci]
+            np.copyto(origFrame, viMod.frame)
             fSh = origFrame.shape
             if len(rois[i]) != 4: rois[i] = (0, 0, fSh[1], fSh[0])
 
@@ -325,7 +333,9 @@ class ESessionManager:
                         # too many motions are recorded in a frame
                             m_pts = []
                             break
-                self.prev_grey[ci][roiIdx] = grey.copy()
+                # store greyscale image (new array from cv2.cvtColor,
+                #   not modified below; no need to copy)
+                self.prev_grey[ci][roiIdx] = grey
                 if len(m_pts) > 0:
                     # store the motion points 
                     rslt["motionPts"] = m_pts
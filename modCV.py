@@ -450,6 +450,58 @@ def getFontScale(cvFont, thresholdPixels=20, thick=1):
 
 #-------------------------------------------------------------------------------
 
+def getResizeMethod(srcSz, dstSz):
+    """ Determine how to resize an image of 'srcSz' to 'dstSz'. 
+    It's meant to be called once per image size, not per image.
+
+    Args:
+        srcSz (tuple): Width and height of the source image.
+        dstSz (tuple): Width and height of the resized image.
+
+    Returns:
+        (str/int): 'copy' (same size), 'pyrDown' (exactly half size), 
+            'pyrDown2' (exactly quarter size) or 
+            interpolation flag for cv2.resize.
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    sw, sh = srcSz
+    dw, dh = dstSz
+    if (sw, sh) == (dw, dh): return "copy"
+    if (sw, sh) == (dw*2, dh*2): return "pyrDown"
+    if (sw, sh) == (dw*4, dh*4): return "pyrDown2"
+    if min(sw/dw, sh/dh) > 1.5: 
+    # large downscale; INTER_AREA avoids moire 
+        return cv2.INTER_AREA
+    return cv2.INTER_LINEAR
+
+#-------------------------------------------------------------------------------
+
+def getFirstFrame(fPath):
+    """ Read the first frame image of a video file.
+    Unlike VideoRW.initReader, it doesn't count frames of the video 
+    and releases the video right after reading.
+
+    Args:
+        fPath (str): Path of video file to read.
+
+    Returns:
+        frame (None/numpy.ndarray): The first (successfully read) frame image.
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    frame = None
+    vCap = cv2.VideoCapture(fPath)
+    for i in range(10): # try a few frames, if a frame fails to be read
+        ret, _frame = vCap.read()
+        if ret: 
+            frame = _frame
+            break
+    vCap.release()
+    return frame
+
+#-------------------------------------------------------------------------------
+
 def clustering(pts, threshold, criterion='distance'):
     """ Cluster given points
 
@@ -841,6 +893,9 @@ class VideoIn:
             self.fSz = (frame.shape[1], frame.shape[0]) # store frame size
             print("Cam index-%i resolution: %s"%(cIdx, str(self.fSz)))
         self.initFrame = frame # store initial frame
+        # whether a frame was sent to main thread and not taken yet;
+        #   (set here, cleared by main thread when it received the frame)
+        self.flagFrameQueued = False 
         ##### [end] class attributes -----
                         
         parent.log("Mod init.", self.classTag) 
@@ -913,6 +968,14 @@ class VideoIn:
         fpsLastLoggingTime = time()
         fps = [0]
         flagFPSLogging = False
+        ### frame buffers to read frame images into, instead of allocating
+        ###   a new array for each frame. Frames are handed over to main
+        ###   thread by reference (no copy); at any time, at most one buffer
+        ###   is held by main thread, one is queued and one is being read.
+        if self.initFrame is None: frameBuf = [None] * 3
+        else: frameBuf = [np.empty_like(self.initFrame) for _ in range(3)]
+        bufIdx = 0 # index of the buffer to read the next frame into
+        queuedBufIdx = -1 # index of the buffer sent last to main thread
 
         ##### [begin] infinite loop of thread -----
         while self.cap.isOpened():
@@ -957,11 +1020,15 @@ class VideoIn:
                         out = stopRecording(out, self.cIdx)
                 q2tMsg = ""
             
-            ret, frame = self.cap.read() # retrieve a frame image
+            # retrieve a frame image
+            ret, frame = self.cap.read(frameBuf[bufIdx])
 
             if not ret: # frame image not retrieved
                 sleep(0.001)
                 continue
+            # store the buffer, in case OpenCV re-allocated it 
+            #   (when frame size changed)
+            frameBuf[bufIdx] = frame
             
             if self.outputFormat == 'video':
             # video recording
@@ -990,11 +1057,21 @@ class VideoIn:
                         else:
                             cv2.imwrite(fp, frame)
                     
-            if flagSendFrame and q2m.empty():
+            if flagSendFrame and not self.flagFrameQueued:
+            # the previously sent frame was taken by main thread
                 ### send frame via queue to main thread
                 if len(fps) > 10: avgFPS = int(np.average(fps[-11:-1]))
                 else: avgFPS = fps[-1]
+                self.flagFrameQueued = True
                 q2m.put(["frameImg", self.cIdx, frame, avgFPS], True, None)
+                # main thread took the previously sent frame and keeps it
+                #   until it takes this one; read into the other buffer.
+                heldBufIdx = queuedBufIdx
+                queuedBufIdx = bufIdx
+                for i in range(len(frameBuf)):
+                    if i not in (heldBufIdx, queuedBufIdx):
+                        bufIdx = i
+                        break
         ##### [end] infinite loop of thread -----
         
         if out != None and type(out) != int:
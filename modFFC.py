@@ -812,17 +812,14 @@ def configuration(wxFrame, flag, configDefV, panel):
                     config["view_%s"%(vmk)] =  True
                 else:
                     config["view_%s"%(vmk)] = False
-        fh = open(configFP, "wb")
-        pickle.dump(config, fh)
-        fh.close()
+        with open(configFP, "wb") as fh:
+            pickle.dump(config, fh, protocol=pickle.HIGHEST_PROTOCOL)
         return
 
     elif flag == "load": 
         if path.isfile(configFP):
         # config file exists
-            fh = open(configFP, "rb")
-            config = pickle.load(fh)
-            fh.close()
+            with open(configFP, "rb") as fh: config = pickle.load(fh)
             for wn in configW:
                 if not wn in config.keys():
                     config[wn] = configDefV[wn] # get default value
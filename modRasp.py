@@ -127,6 +127,9 @@ class RaspCSICam:
         else:
             self.res = desiredRes
         self.fps = 30 
+        # whether a frame was sent to main thread and not taken yet;
+        #   (set here, cleared by main thread when it received the frame)
+        self.flagFrameQueued = False 
         ##### [end] setting up attributes -----
  
         parent.log("Mod init.", self.classTag)
@@ -199,8 +202,10 @@ class RaspCSICam:
             frame = stream.array.copy() # frame image
             stream.truncate(0) # clear the stream for the next frame
             
-            if q2m.empty():
+            if not self.flagFrameQueued:
+            # the previously sent frame was taken by main thread
                 # send frame via queue to main
+                self.flagFrameQueued = True
                 q2m.put(["frameImg", self.cIdx, frame], True, None)
 
         ##### [end] infinite loop of thread -----
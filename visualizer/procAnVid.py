@@ -11,23 +11,23 @@ Dependency:
 last edited: 2024-05-16
 """
 
-import sys, csv, ctypes, string
-from os import path, remove
+import sys, csv, ctypes, string, pickle, queue
+from threading import Thread
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from os import path, remove, cpu_count
 from glob import glob
 from copy import copy
 from time import time
 from datetime import datetime, timedelta
 from random import randint
+from bisect import bisect_left, bisect_right
 
 import wx, cv2
 import numpy as np
-import pandas as pd
-from scipy.signal import find_peaks, savgol_filter, welch, periodogram
-from scipy.cluster.vq import vq, kmeans, kmeans2
-from scipy.spatial.distance import cdist 
-from scipy import stats
-# package for anomaly detection
-from tsmoothie.smoother import LowessSmoother
+# * SciPy and tsmoothie are imported in the functions using them,
+#   as they're needed only for certain processes.
 
 from initVars import *
 from modFFC import *
@@ -38,6 +38,406 @@ DEBUG = False
 #csv.field_size_limit(sys.maxsize)
 csv.field_size_limit(int(ctypes.c_ulong(-1).value//2))
 
+# translation table to replace coordinate separators ('&' between points
+#   and '/' between values) in AnVid CSV data with spaces
+#   for parsing with np.fromstring
+COORD_SEP_TBL = str.maketrans("&/", "  ")
+# translation table to make a compact datetime label
+#   such as '20231128T235901' from '2023-11-28 23:59:01'
+DT_LBL_TBL = str.maketrans({":": "", "-": "", " ": "T"})
+
+#===============================================================================
+
+def parseCoordCells(cells, nVal, q2m=None):
+    """ Parse coordinate strings of multiple CSV cells at once.
+    motionPts are stored as x/y&x/y& ...
+    ant- or broodBlobRectPts are stored as 
+      x1/y1/x2/y2/x3/y3/x4/y4&x1/y1/x2/y2/ ...
+    All cells are joined and parsed with a single call of NumPy's 
+      C parser, then split back to each cell with the number of '/'.
+    If the number of parsed values doesn't match, each cell is parsed
+      separately and a malformed cell becomes None (reported via q2m).
+    A cell without any coordinate set also becomes None, 
+      same as an empty cell.
+
+    Args:
+        cells (list): List of (non-empty) strings of cells.
+        nVal (int): Number of values of each coordinate set;
+          2 for motionPts, 8 for ant- or broodBlobRectPts.
+        q2m (None/queue.Queue): Queue to report malformed cells.
+
+    Returns:
+        arr (numpy.ndarray): All parsed values of valid cells, 
+          shape (N, nVal).
+        arrLst (list): Parsed arrays of each cell, or None for 
+          a cell without coordinates or a malformed cell.
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    nSep = np.array([c.count("/") for c in cells]) # number of '/'
+    # number of coordinate sets in each cell
+    cnt = nSep // (nVal-1)
+    arr = np.fromstring("&".join(cells).translate(COORD_SEP_TBL), 
+                        dtype=np.int32, sep=" ")
+    if arr.size == np.sum(cnt)*nVal and not np.any(nSep % (nVal-1)):
+        arr = arr.reshape((-1, nVal))
+        arrLst = np.split(arr, np.cumsum(cnt)[:-1])
+        arrLst = [_arr if len(_arr) > 0 else None for _arr in arrLst]
+        return arr, arrLst
+
+    ### malformed cell(s); parse each cell separately
+    arrLst = []
+    for c, _cnt, _nSep in zip(cells, cnt.tolist(), nSep.tolist()):
+        _arr = np.fromstring(c.translate(COORD_SEP_TBL), dtype=np.int32,
+                             sep=" ")
+        if _arr.size != _cnt*nVal or _nSep % (nVal-1):
+            msg = "Malformed coordinate cell ignored: %s"%(c)
+            if q2m is None: MyLogger.warning(msg)
+            else: q2m.put(("displayMsg", msg), True, None)
+            arrLst.append(None)
+        elif _cnt == 0:
+            arrLst.append(None)
+        else:
+            arrLst.append(_arr.reshape((-1, nVal)))
+    _arrLst = [_arr for _arr in arrLst if _arr is not None]
+    if len(_arrLst) == 0: arr = np.empty((0, nVal), dtype=np.int32)
+    else: arr = np.concatenate(_arrLst)
+    return arr, arrLst
+
+#-------------------------------------------------------------------------------
+
+def loadAnVidData(fp, q2m=None):
+    """ Read a CSV data file from AnVid and detect arena & tunnels 
+    with the first frame image of the corresponding video file.
+    It's a module-level function to be run in a separate process.
+
+    Args:
+        fp (str): CSV file path.
+        q2m (None/queue.Queue): Queue to send progress messages.
+
+    Returns:
+        (dict): Filename key (fnK), the first frame image (fImg), data, 
+          timestamp, datetime of timestamp (timestampDT), seconds of 
+          timestamp since the first one (timestampSec), tunnel, 
+          column titles (colTitles), half width & height of tunnel area 
+          (tHW & tHH) and message to return (retMsg).
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    from scipy.cluster.vq import kmeans
+
+    retMsg = ""
+    fnK = path.basename(fp).replace(".csv", "")
+    data = {} # extracted data 
+    timestamp = [] # timestamp of data 
+    tunnel = {} # tunnel position (automatically detected)
+    colTitles = [] # column title list in CSV data file 
+
+    ### x & y of all motion points; 
+    ###   stored as a list of arrays (one array per parsed block of rows) 
+    ###   and concatenated after reading the file
+    mPtX = {} 
+    mPtY = {}
+
+    def parseCells(colMeta):
+    # parse coordinate strings, pending in each column
+        for cT, dataK, roiK, dLst, pend in colMeta:
+            if pend is None or len(pend["cells"]) == 0: continue
+            if dataK == "motionPts": nVal = 2
+            else: nVal = 8
+            arr, arrLst = parseCoordCells(pend["cells"], nVal, q2m)
+            for pos, _arr in zip(pend["pos"], arrLst): dLst[pos] = _arr
+            if dataK == "motionPts" and len(arr) > 0:
+                mPtX[roiK].append(arr[:,0])
+                mPtY[roiK].append(arr[:,1])
+            pend["pos"] = []
+            pend["cells"] = []
+
+    colMeta = []
+    with open(fp, "r", newline="", buffering=1<<20) as fh:
+        # tokenize rows with csv module (C parser);
+        #   items are separated by ", "
+        reader = csv.reader(fh, skipinitialspace=True)
+        for items in reader:
+        # read rows (streaming; not storing all lines in memory)
+            if reader.line_num%10000 == 0:
+                # parse coordinates of rows read so far
+                parseCells(colMeta)
+                if q2m is not None:
+                    msg = f'Reading CSV data from {fnK}..'
+                    msg += f' {reader.line_num} lines'
+                    q2m.put(("displayMsg", msg), True, None)
+            if len(items) == 0: continue
+            # header row; 
+            #   (cells have no leading spaces with skipinitialspace, 
+            #    no need to strip the cell of every row)
+            if items[0] == "frame-index":
+                parseCells(colMeta)
+                if colTitles == []:
+                    ### store column title
+                    colTitles = [cT.strip() for cT in items]
+                # meta info of each column; 
+                #   (column-title, data-key, ROI-key, list to store, 
+                #    pending cells to parse)
+                #   computed once here, not for every row
+                colMeta = []
+                for cT in colTitles:
+                    if cT in ["frame-index", "timestamp"]: 
+                        colMeta.append((cT, None, None, None, None))
+                        continue
+                    # data-key; 'motionPts', 'antBlobRectPts', 
+                    #   'broodBlobRectPts'
+                    dataK = cT.rstrip(string.digits)
+                    # ROI index; 00, 01 and so on
+                    #   with row & column index from AnVid
+                    roiK = "roi" + cT.replace(dataK, "")
+                    if not roiK in data.keys():
+                        data[roiK] = {} # dict with each ROI
+                        mPtX[roiK] = []
+                        mPtY[roiK] = []
+                    # list for each data-type
+                    data[roiK][dataK] = []
+                    colMeta.append((cT, dataK, roiK, data[roiK][dataK],
+                                    dict(pos=[], cells=[])))
+                continue
+
+            if len(items) < len(colTitles): continue
+
+            for item, (cT, dataK, roiK, dLst, pend) in zip(items, colMeta):
+                if cT == "frame-index": continue
+                item = item.rstrip()
+
+                if cT == "timestamp":
+                    timestamp.append(item)
+                    continue
+
+                if item != "":
+                    ### store the cell to parse later with other cells
+                    ###   (None in dLst will be replaced with parsed data)
+                    pend["pos"].append(len(dLst))
+                    pend["cells"].append(item)
+                dLst.append(None)
+        parseCells(colMeta) # parse the remaining cells
+
+    # datetime of each timestamp; 
+    #   parsed once here, instead of in each data bundling
+    timestampDT = [get_datetime(ts) for ts in timestamp]
+    # seconds since the first timestamp
+    timestampSec = np.array([(dt-timestampDT[0]).total_seconds() 
+                             for dt in timestampDT], dtype=np.float64)
+
+    for roiK in mPtX.keys():
+        for mPt in [mPtX, mPtY]:
+            if len(mPt[roiK]) == 0:
+                mPt[roiK] = np.empty(0, dtype=np.int32)
+            else:
+                mPt[roiK] = np.concatenate(mPt[roiK])
+
+    ### get a video file path of the first csv data file
+    for ext in ["mp4", "mkv", "mov", "avi"]:
+        vfp = fp.replace(".csv", f'.{ext}')
+        if path.isfile(vfp): break
+    fImg = getFirstFrame(vfp) # store the first frame image
+
+    fH, fW = fImg.shape[:2]
+    tHW = int(fW/6) # half of tunnel area width
+    tHH = int(fH/15) # half of tunnel area height
+
+    cir = detectArena(vfp, fImg) # detect circles (arena)
+    if cir is not None: # arena found
+        for roiI, roiK in enumerate(data.keys()):
+
+            ### determine the found circle position and radius
+            ###   which matches with the current ROI 
+            mx = np.mean(mPtX[roiK])
+            my = np.mean(mPtY[roiK])
+            cirArr = np.asarray(cir)
+            # squared distances (enough to find the closest circle)
+            d2 = (cirArr[:,0]-mx)**2 + (cirArr[:,1]-my)**2
+            cx, cy, cr = cir[int(np.argmin(d2))]
+            cv2.circle(fImg, (cx, cy), cr, (255,255,100), 1)
+
+            mpx = mPtX[roiK]
+            mpy = mPtY[roiK]
+            dists = np.sqrt((mpx-cx)**2 + (mpy-cy)**2)
+            # get indices of points out of the arena 
+            idx = (dists > cr*1.05).nonzero()[0]
+            if len(idx) == 0:
+                retMsg = "No motion-points out of the arena found."
+                retMsg += " Tunnel position cannot be determined."
+                x = int(np.mean(mpx))
+                y = int(np.mean(mpy))
+                pt1 = (x-tHW, y-tHH)
+                pt2 = (x+tHW, y+tHH)
+                tunnel[roiK] = (pt1, pt2)
+            else:
+                ##### [begin] get center point of tunnels for stimulus
+                '''
+                ### mark points outside of the arena
+                for i in idx:
+                    cv2.circle(fImg, (mpx[i], mpy[i]), 2, 
+                               (50,50,100), -1)
+                '''
+
+                _x = mpx[idx]
+                _y = mpy[idx]
+                pts = np.hstack((_x.reshape((_x.shape[0],1)),
+                                 _y.reshape((_y.shape[0],1)))) 
+                pts = pts.astype(np.float32)
+                _my = np.mean(_y)
+                # inital 3 centroids
+                initCt = np.array([[np.min(_x), _my], 
+                                   [np.median(_x), _my], 
+                                   [np.max(_x), _my]])
+                # k-means clustering, assuming 3 tunnels
+                ctr, __ = kmeans(obs=pts, k_or_guess=initCt)
+                ### drop centroids, too far away from 
+                ###   the other centroids
+                d = np.linalg.norm(ctr[:,None,:]-ctr[None,:,:], axis=-1)
+                np.fill_diagonal(d, np.inf)
+                keep = d.min(axis=1) < cr
+                # keep all if there's no close centroid 
+                #   (e.g.: only one centroid)
+                if not keep.any(): keep[:] = True
+                '''
+                # mark the centroids
+                for x, y in ctr[keep]:
+                    cv2.circle(fImg, (int(x),int(y)), 5, 
+                               (0,0,255), -1)
+                '''
+                x = int(np.mean(ctr[keep,0]))
+                y = int(np.mean(ctr[keep,1])) 
+                pt1 = (x-tHW, y-tHH)
+                pt2 = (x+tHW, y+tHH)
+                # mark the tunnel area 
+                #cv2.rectangle(fImg, pt1, pt2, clr["tuC"], 2)
+                ##### [end] get center point of tunnels for stimulus
+                # store the tunnel center-position 
+                tunnel[roiK] = (pt1, pt2)
+
+    return dict(fnK=fnK, fImg=fImg, data=data, timestamp=timestamp, 
+                timestampDT=timestampDT, timestampSec=timestampSec, 
+                tunnel=tunnel, colTitles=colTitles, tHW=tHW, tHH=tHH, 
+                retMsg=retMsg)
+
+#-------------------------------------------------------------------------------
+
+def loadAnVidDataPacked(fp, q2m=None):
+    """ loadAnVidData for running in a separate process.
+    Per-row coordinate arrays of each data column are packed into 
+      one array with the number of rows of each cell, 
+      so that a few large arrays are pickled to the main process, 
+      instead of a Python list of small arrays.
+      (unpacked with unpackCoordLst)
+
+    Args:
+        fp (str): CSV file path.
+        q2m (None/queue.Queue): Queue to send progress messages.
+
+    Returns:
+        (dict): Return value of loadAnVidData with packed 'data'.
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    rslt = loadAnVidData(fp, q2m)
+    for roiK in rslt["data"].keys():
+        for dataK, dLst in rslt["data"][roiK].items():
+            if dataK == "motionPts": nVal = 2
+            else: nVal = 8
+            # whether each cell has data
+            valid = np.array([_a is not None for _a in dLst], dtype=bool)
+            # number of coordinate sets in each cell
+            cnt = np.array([len(_a) if _a is not None else 0 \
+                                for _a in dLst], dtype=np.int64)
+            _arrLst = [_a for _a in dLst if _a is not None]
+            if len(_arrLst) == 0: arr = np.empty((0, nVal), dtype=np.int32)
+            else: arr = np.concatenate(_arrLst)
+            rslt["data"][roiK][dataK] = dict(arr=arr, cnt=cnt, valid=valid)
+    return rslt
+
+#-------------------------------------------------------------------------------
+
+def unpackCoordLst(pk):
+    """ Unpack data packed in loadAnVidDataPacked.
+
+    Args:
+        pk (dict): Packed data of a column; arr, cnt and valid.
+
+    Returns:
+        (list): Array (view of pk['arr']) or None of each cell.
+    """
+    if DEBUG: MyLogger.info(str(locals()))
+
+    arrLst = np.split(pk["arr"], np.cumsum(pk["cnt"])[:-1])
+    return [_a if _v else None for _a, _v in zip(arrLst, 
+                                                  pk["valid"].tolist())]
+
+#-------------------------------------------------------------------------------
+
+def detectArena(vfp, img):
+    """ Detect circles (arena) in the first frame image of a video.
+    The result is cached in a file next to the video file and reused
+      as long as the video file is not modified.
+
+    Args:
+        vfp (str): Video file path.
+        img (numpy.ndarray): The first frame image of the video.
+
+    Returns:
+        cir (None/list): Detected circles, [[x, y, radius], ...];
+          large circles first, at most two circles.
+    """ 
+    if DEBUG: MyLogger.info(str(locals()))
+
+    cacheFP = vfp + ".arena"
+    mTime = path.getmtime(vfp)
+    if path.isfile(cacheFP):
+        try:
+            with open(cacheFP, "rb") as fh: cache = pickle.load(fh)
+            if cache["mTime"] == mTime: return cache["cir"]
+        except:
+            pass
+
+    gImg0 = makeImgDull(img, 1, 1, True)
+    ### arena is a large circle; detect it on a half-sized image
+    ###   (4 times less pixels to process) and scale the result back.
+    ###   if not found, try again on the full-sized image.
+    for rat in [2, 1]:
+        if rat == 1: gImg = gImg0
+        else:
+            gImg = cv2.resize(gImg0, 
+                              (gImg0.shape[1]//rat, gImg0.shape[0]//rat),
+                              interpolation=cv2.INTER_AREA)
+        fH = gImg.shape[0]
+        minDist = int(fH*0.5) 
+        minRadius = int(fH*0.25)
+        maxRadius = int(fH*0.5)
+        param1 = 25
+        # accumulator threshold (smaller -> more false circles); 
+        #   votes of a circle decrease with its perimeter in the smaller image
+        param2 = int(100/rat) 
+        cir = cv2.HoughCircles(gImg, cv2.HOUGH_GRADIENT, 1, 
+                               minDist, param1=param1, param2=param2, 
+                               minRadius=minRadius, maxRadius=maxRadius)
+        if cir is not None: break # arena found
+
+    if cir is None: return None # don't cache a failed detection
+
+    cir = (cir[0,:]*rat).astype(np.int32)
+    # sort to have the large circles first (at most two circles)
+    cir = cir[np.argsort(-cir[:,2], kind="stable")][:2].tolist()
+
+    ### store the result
+    try:
+        with open(cacheFP, "wb") as fh:
+            pickle.dump(dict(mTime=mTime, cir=cir), fh, 
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    except:
+    # failed to write (e.g.: no write permission on the folder)
+        pass
+
+    return cir
+
 #===============================================================================
 
 class ProcAnVidRslt:
@@ -73,6 +473,8 @@ class ProcAnVidRslt:
         self.singleRLstROI[7] = "roi00"  
         self.singleRLstROI[11] = "roi01"  
         self.singleRLstROI[33] = "roi00"  
+        # heatmap array; allocated once and reused in each drawGraph
+        self.hmArrBuf = None
         ##### [end] setting up attributes on init. -----
 
     #---------------------------------------------------------------------------
@@ -95,6 +497,8 @@ class ProcAnVidRslt:
         fImg = {} # first frame image of each video file
         data = {} # extracted data from each file
         timestamp = {} # timestamp of data from each file
+        timestampDT = {} # datetime of timestamp of each file
+        timestampSec = {} # seconds since the first timestamp of each file
         tunnel = {} # tunnel position (initially;automatically detected)
         colTitles = [] # column title list in CSV data file 
         tHW = -1
@@ -126,187 +530,60 @@ class ProcAnVidRslt:
             retMsg += " corresponding filenames."
             # return data
             ret = dict(fImg=fImg, data=data, timestamp=timestamp, 
+                       timestampDT=timestampDT, timestampSec=timestampSec,
                        tunnel=tunnel, tHW=tHW, tHH=tHH, colTitles=colTitles, 
                        fnKIdx=0)
             output = ("finished", ret, dict(retMsg=retMsg))
             q2m.put(output, True, None)
-
-        for fpi, fp in enumerate(fpLst):
-        # go through file list
-            fnK = path.basename(fp).replace(".csv", "")
-            
-            msg = f'Reading CSV data from {fnK}.. {fpi+1}/{len(fpLst)}'
-            q2m.put(("displayMsg", msg), True, None)
-            
-            data[fnK] = {}
-            tunnel[fnK] = {} 
-            timestamp[fnK] = []
-
-            mPtX = {} # list of x of all motion poiints
-            mPtY = {} # list of y of all motion poiints
-
-            fh = open(fp, "r")
-            lines = fh.readlines()
-            fh.close()
-            
-            for line in lines:
-            # read lines
-                if line.strip().startswith("frame-index"):
-                    if colTitles == []:
-                        ### store column title
-                        colTitles = [cT.strip() for cT in line.split(",")]
-                    for cT in colTitles:
-                        if cT in ["frame-index", "timestamp"]: continue
-                        # data-key; 
-                        #   'motionPts', 'antBlobRectPts', 'broodBlobRectPts'
-                        dataK = cT.rstrip(string.digits)
-                        # ROI index; 00, 01 and so on
-                        #   with row & column index from AnVid
-                        roiK = "roi" + cT.replace(dataK, "")
-                        if not roiK in data[fnK].keys():
-                            data[fnK][roiK] = {} # dict with each ROI
-                            mPtX[roiK] = []
-                            mPtY[roiK] = []
-                        # list for each data-type
-                        data[fnK][roiK][dataK] = []
-                    continue
-                
-                items = [it.strip() for it in line.split(",")]
-                if len(items) < len(colTitles): continue
-                
-                for ii, item in enumerate(items):
-                    if ii >= len(colTitles): continue
-                    if colTitles[ii] == "frame-index": continue
-                    
-                    if colTitles[ii] == "timestamp":
-                        timestamp[fnK].append(item)
-                        continue
-
-                    dataK = colTitles[ii].rstrip(string.digits) 
-                    roiK = "roi" + colTitles[ii].replace(dataK, "")
-                    if item == "":
-                        data[fnK][roiK][dataK].append(None)
-                    else:
-                        ''' Split by coordinates.
-                        motionPts are stored as x/y&x/y& ...
-                        ant- or broodBlobRectPts are stored as 
-                            x1/y1/x2/y2/x3/y3/x4/y4&x1/y1/x2/y2/ ...
-                        '''
-                        _data = []
-                        coords = item.split("&")
-                        for coord in coords:
-                            if coord.strip() == "": continue
-                            coord = [int(x) for x in coord.split("/")]
-                            if dataK == "motionPts":
-                                mPtX[roiK].append(coord[0])
-                                mPtY[roiK].append(coord[1])
-                            _data.append(coord)
-                        data[fnK][roiK][dataK].append(_data) 
-
-            vRW = VideoRW(self) # video reading/writing
-            ### get a video file path of the first csv data file
-            for ext in ["mp4", "mkv", "mov", "avi"]:
-                vfp = fp.replace(".csv", f'.{ext}')
-                if path.isfile(vfp): break
-            vRW.initReader(vfp) # load a video file 
-            ret = vRW.getFrame() # read one frame
-            fImg[fnK] = vRW.currFrame.copy() # store the frame image
-
-            fH, fW = fImg[fnK].shape[:2]
-            tHW = int(fW/6) # half of tunnel area width
-            tHH = int(fH/15) # half of tunnel area height
-
-            ### detect circles (arena) 
-            gImg = makeImgDull(fImg[fnK], 1, 1, True)
-            minDist = int(fH*0.5) 
-            minRadius = int(fH*0.25)
-            maxRadius = int(fH*0.5)
-            param1 = 25
-            param2 = 100 # (smaller -> more false circles)
-            cir = cv2.HoughCircles(gImg, cv2.HOUGH_GRADIENT, 1, 
-                                   minDist, param1=param1, param2=param2, 
-                                   minRadius=minRadius, maxRadius=maxRadius)
-            if cir is not None: # arena found
-                cir = pd.DataFrame(cir[0,:].astype('i'))
-                # sort to have the large circles first
-                cir = cir.sort_values(2, ascending=False)
-                cir = cir.values.tolist()
-                if len(cir) > 2: cir = cir[:2]
-           
-                for roiI, roiK in enumerate(data[fnK].keys()):
-                    
-                    ### determine the found circle position and radius
-                    ###   which matches with the current ROI 
-                    mx = np.mean(mPtX[roiK])
-                    my = np.mean(mPtY[roiK])
-                    dists = []
-                    for ci, (cx, cy, cr) in enumerate(cir):
-                        dists.append(np.sqrt((cx-mx)**2 + (cy-my)**2))
-                    cx, cy, cr = cir[dists.index(np.min(dists))]
-                    cv2.circle(fImg[fnK], (cx, cy), cr, (255,255,100), 1)
-                    
-                    mpx = np.asarray(mPtX[roiK])
-                    mpy = np.asarray(mPtY[roiK])
-                    dists = np.sqrt((mpx-cx)**2 + (mpy-cy)**2)
-                    # get indices of points out of the arena 
-                    idx = (dists > cr*1.05).nonzero()[0]
-                    if len(idx) == 0:
-                        retMsg = "No motion-points out of the arena found."
-                        retMsg += " Tunnel position cannot be determined."
-                        x = int(np.mean(mpx))
-                        y = int(np.mean(mpy))
-                        pt1 = (x-tHW, y-tHH)
-                        pt2 = (x+tHW, y+tHH)
-                        tunnel[fnK][roiK] = (pt1, pt2)
-                    else:
-                        ##### [begin] get center point of tunnels for stimulus
-                        '''
-                        ### mark points outside of the arena
-                        for i in idx:
-                            cv2.circle(fImg[fnK], (mpx[i], mpy[i]), 2, 
-                                       (50,50,100), -1)
-                        '''
-
-                        _x = mpx[idx]
-                        _y = mpy[idx]
-                        pts = np.hstack((_x.reshape((_x.shape[0],1)),
-                                         _y.reshape((_y.shape[0],1)))) 
-                        pts = pts.astype(np.float32)
-                        _my = np.mean(_y)
-                        # inital 3 centroids
-                        initCt = np.array([[np.min(_x), _my], 
-                                           [np.median(_x), _my], 
-                                           [np.max(_x), _my]])
-                        # k-means clustering, assuming 3 tunnels
-                        ctr, __ = kmeans(obs=pts, k_or_guess=initCt)
-                        xs = []
-                        ys = []
-                        for i, (x, y) in enumerate(ctr):
-                            ### check the cluster centroid whether it's 
-                            ###   too far away from the other centroids
-                            flagDrop = True 
-                            for j, (x1, y1) in enumerate(ctr):
-                                if i == j: continue
-                                dist = np.sqrt((x-x1)**2 + (y-y1)**2)
-                                if dist < cr: flagDrop = False
-                            # it's too far away from the others, ignore
-                            if flagDrop: continue
-                            xs.append(x)
-                            ys.append(y)
-                            '''
-                            # mark the centroid
-                            cv2.circle(fImg[fnK], (int(x),int(y)), 5, 
-                                       (0,0,255), -1)
-                            '''
-                        x = int(np.mean(xs))
-                        y = int(np.mean(ys)) 
-                        pt1 = (x-tHW, y-tHH)
-                        pt2 = (x+tHW, y+tHH)
-                        # mark the tunnel area 
-                        #cv2.rectangle(fImg[fnK], pt1, pt2, clr["tuC"], 2)
-                        ##### [end] get center point of tunnels for stimulus
-                        # store the tunnel center-position 
-                        tunnel[fnK][roiK] = (pt1, pt2)
+            return
+
+        msg = f'Reading CSV data from {len(fpLst)} files..'
+        q2m.put(("displayMsg", msg), True, None)
+        ### read & process each file in parallel; 
+        ###   it's CPU-bound (parsing & arena detection), 
+        ###   so separate processes are used.
+        ###   ('spawn' instead of forking this multi-threaded wx process)
+        mpCtx = get_context("spawn")
+        nWorkers = min(len(fpLst), cpu_count() or 1)
+        try:
+            with mpCtx.Manager() as mngr, \
+              ProcessPoolExecutor(max_workers=nWorkers, 
+                                  mp_context=mpCtx) as ex:
+                # queue to receive progress messages from the processes
+                q2p = mngr.Queue() 
+                futures = [ex.submit(loadAnVidDataPacked, fp, q2p) \
+                             for fp in fpLst]
+                while not all([f.done() for f in futures]):
+                    ### pass progress messages to the main thread
+                    try: q2m.put(q2p.get(timeout=0.2), True, None)
+                    except queue.Empty: pass
+                ### pass the remaining progress messages
+                while True:
+                    try: q2m.put(q2p.get_nowait(), True, None)
+                    except queue.Empty: break
+                rslts = [f.result() for f in futures]
+            ### unpack coordinate data of each cell
+            for rslt in rslts:
+                for roiK in rslt["data"].keys():
+                    for dataK, pk in rslt["data"][roiK].items():
+                        rslt["data"][roiK][dataK] = unpackCoordLst(pk)
+        except (BrokenProcessPool, OSError):
+        # failed to run processes; process them in this thread 
+            MyLogger.exception("Failed to load data in separate processes.")
+            rslts = [loadAnVidData(fp, q2m) for fp in fpLst]
+
+        for rslt in rslts:
+            fnK = rslt["fnK"]
+            fImg[fnK] = rslt["fImg"]
+            data[fnK] = rslt["data"]
+            timestamp[fnK] = rslt["timestamp"]
+            timestampDT[fnK] = rslt["timestampDT"]
+            timestampSec[fnK] = rslt["timestampSec"]
+            tunnel[fnK] = rslt["tunnel"]
+            if colTitles == []: colTitles = rslt["colTitles"]
+            tHW = rslt["tHW"]
+            tHH = rslt["tHH"]
+            if rslt["retMsg"] != "": retMsg = rslt["retMsg"]
 
         # [multiple measures; Not being used;2024-04]
         # graph line color for multiple measures
@@ -315,6 +592,7 @@ class ProcAnVidRslt:
 
         # return data
         ret = dict(fImg=fImg, data=data, timestamp=timestamp, 
+                   timestampDT=timestampDT, timestampSec=timestampSec, 
                    tunnel=tunnel, tHW=tHW, tHH=tHH, colTitles=colTitles, 
                    fnKIdx=0)
 
@@ -341,9 +619,12 @@ class ProcAnVidRslt:
         prnt = self.parent # graph processing module (procGraph.py)
         fnK = list(self.v["data"].keys())[self.v["fnKIdx"]] # filename key
         data = self.v["data"][fnK] # list of lines in CSV result file
-        timestamp = self.v["timestamp"][fnK] # data timestamp 
+        tsDT = self.v["timestampDT"][fnK] # datetime of data timestamp 
+        tsSec = self.v["timestampSec"][fnK] # seconds of data timestamp 
         #tunnel = self.v["tunnel"][fnK] # center of tunnels
-        fImg = self.v["fImg"][fnK].copy() # frame images 
+        # frame image 
+        #   (not copied here; copy before drawing on it)
+        fImg = self.v["fImg"][fnK] 
         fH, fW = fImg.shape[:2]
         tunnel = {}
         tHW = self.v["tHW"] # half of tunnel area width
@@ -402,6 +683,7 @@ class ProcAnVidRslt:
             fScale, txtW, txtH, txtBl = getFontScale(
                                     cvFont, thresholdPixels=thP, thick=fThck
                                     )
+            fImg = fImg.copy() # copy to draw on it
             rImg = fImg
             ### write filename
             tx = 5
@@ -458,8 +740,15 @@ class ProcAnVidRslt:
             hmIntv = timedelta(seconds=hmIntvMin*60)
             if hmIntvMin == -1: gSIdx = 0 
             if proc2run.startswith("spAHeatmap"):
-                # init array for heatmap
-                hmArr = np.zeros(fImg.shape[:2], dtype=np.uint32) 
+                ### init array for heatmap
+                ###   (reuse the array of previous run, if possible;
+                ###    drawHeatmap doesn't return this array itself)
+                shape = fImg.shape[:2]
+                if self.hmArrBuf is None or self.hmArrBuf.shape != shape:
+                    self.hmArrBuf = np.zeros(shape, dtype=np.uint32) 
+                else:
+                    self.hmArrBuf.fill(0)
+                hmArr = self.hmArrBuf
                 ### get heatmap point radius
                 ###   if this is -1, it will be a single pixel 
                 txt = wx.FindWindowByName("hmPt_txt", main.panel["ml"])
@@ -476,7 +765,7 @@ class ProcAnVidRslt:
                     _d = dict(motion=data[roiK]["motionPts"], 
                               brood=data[roiK]["broodBlobRectPts"])
                 else: _d = data[roiK]["motionPts"]
-                args = (proc2run, fnK, _d, timestamp, tunnel[roiK], \
+                args = (proc2run, fnK, _d, tsDT, tsSec, tunnel[roiK], \
                         bData[roiK], bD_dt[roiK], gSIdx, dPtIntvSec, dPtIntv, \
                         hmIntvMin, hmIntv, hmArr, q2m)
                 ret = self.bundleData(args)
@@ -501,23 +790,43 @@ class ProcAnVidRslt:
                 graphH = 500
 
             if proc2run.startswith("spAHeatmap"):
+                ### get heatmap options
+                hmOpt = {}
+                w = wx.FindWindowByName("heatmapMax_txt", main.panel["ml"])
+                try: hmOpt["maxV"] = int(w.GetValue())
+                except: hmOpt["maxV"] = -1
+                w = wx.FindWindowByName("saveHMVideo_chk", main.panel["ml"])
+                hmOpt["saveVideo"] = w.GetValue()
+                if hmOpt["saveVideo"]:
+                    w = wx.FindWindowByName("heatMapVideoFPS_cho", 
+                                            main.panel["ml"])
+                    hmOpt["videoFPS"] = int(w.GetString(w.GetSelection())) 
                 ### drawing heatmap
                 args = (fnK, hmArr, main, prnt, bData, bD_dt, \
-                        cvFont, hmRad, gSDT, gEDT, q2m, fImg)
+                        cvFont, hmRad, gSDT, gEDT, q2m, fImg, hmOpt)
                 rImg, rawData = self.drawHeatmap(args)
             
             else:
                 # graph background color
                 gBg = (30, 30, 30) 
+                if proc2run in procLst2drawBarGraph: 
+                    ### get bar-graph options (once for all ROIs)
+                    bgOpt = {}
+                    w = wx.FindWindowByName("barGMax_txt", main.panel["ml"])
+                    try: bgOpt["maxV"] = int(w.GetValue())
+                    except: bgOpt["maxV"] = -1
+                    for k in ["outlier", "smoothLine", "peak"]:
+                        w = wx.FindWindowByName(f'{k}_chk', main.panel["ml"])
+                        bgOpt[k] = w.GetValue()
                 rawData = {}
                 nDCols = {}
-                y = 0
+                gImgLst = [] # graph image of each ROI
                 for roiK in roiKeyLst:
                     if proc2run in procLst2drawBarGraph: 
                         ### drawing bar graph
                         args = (proc2run, fnK, roiK, bData[roiK], dPtIntvSec, \
                                 graphW, graphH, gBg, cvFont, \
-                                bD_dt[roiK], main, q2m, gSDT, gEDT)
+                                bD_dt[roiK], main, q2m, gSDT, gEDT, bgOpt)
                         ret = self.drawBarGraph(args) # draw graph for this ROI
                         retGImg, nDCols[roiK], rawData[roiK] = ret
 
@@ -532,16 +841,13 @@ class ProcAnVidRslt:
                         retGImg, fsPeriod, mg, retMsg = self.drawPSD(args)
                         rawData = [None]
 
-                    if rImg is None:
-                        ### init the return image
-                        gH, gW = retGImg.shape[:2] # size of a graph for one ROI
-                        iH = gH * len(roiKeyLst) # height of the return image
-                        rImg = np.zeros((iH, gW, 3), dtype=np.uint8)
+                    gImgLst.append(retGImg) # store the returned graph image
 
-                    rImg[y:y+gH] = retGImg # store the returned graph image
-                    y += gH 
-                    # store the height of each ROI graph
-                    gInfo["roiGraphHght"] = iH
+                ### stack graphs of all ROIs into the return image;
+                ###   allocated once, after the graph sizes are known
+                rImg = np.concatenate(gImgLst, axis=0)
+                # store the height of each ROI graph
+                gInfo["roiGraphHght"] = rImg.shape[0]
             ##### [end] drawing graph -----
             
         q2m.put(("displayMsg", "storing image and data..",), True, None)
@@ -570,27 +876,29 @@ class ProcAnVidRslt:
 
     #---------------------------------------------------------------------------
 
-    def initTBin(self, proc2run):
-        """ init. temporary lists, depending on proc2run 
+    def initTBin(self, proc2run, bufLen):
+        """ init. temporary buffers, depending on proc2run 
         
         Args:
             proc2run (str): Process to run
+            bufLen (int): Max. number of values in a bundle
          
         Returns:
-            None
+            tBin (dict): Temporary buffers; values are written at 
+              the cursor 'n', which is reset to zero for the next bundle.
         """ 
         #if DEBUG: MyLogger.info(str(locals()))
    
         tBin = {}
         
         if proc2run.startswith("intensity") or proc2run.startswith("presence"):
-            tBin = dict(val=[])
+            tBin = dict(val=np.zeros(bufLen, dtype=np.int64), n=0)
         
         elif proc2run.startswith("spA"):
             tBin = dict(pts=[], ts=[])
         
         elif proc2run.startswith("dist"):
-            tBin = dict(dists=[])
+            tBin = dict(dists=np.zeros(bufLen, dtype=np.float64), n=0)
 
         return tBin
 
@@ -611,8 +919,8 @@ class ProcAnVidRslt:
         #if DEBUG: MyLogger.info(str(locals()))
         
         if proc2run.startswith("spAHeatmap"):
-        # heatmap; has list of motion-points in each bundle
-            fillItem = []
+        # heatmap; has an array of motion-points in each bundle
+            fillItem = np.empty((0, 2), dtype=np.int32)
         elif proc2run.startswith("dist2"):
         # distance measure 
             fillItem = -1
@@ -637,19 +945,25 @@ class ProcAnVidRslt:
         """ 
         if DEBUG: MyLogger.info(str(locals()))
         
+        from scipy.spatial.distance import cdist 
+
         main = self.mainFrame
 
-        proc2run, fnK, data, timestamp, tunnel, bD, bD_dt, gSIdx, dPtIntvSec, \
-          dPtIntv, hmIntvMin, hmIntv, hmArr, q2m = args
+        proc2run, fnK, data, tsDT, tsSec, tunnel, bD, bD_dt, gSIdx, \
+          dPtIntvSec, dPtIntv, hmIntvMin, hmIntv, hmArr, q2m = args
 
-        if proc2run in ["distP2T", "distA2T"]:
+        if proc2run in ["intensityT", "presenceT", "distP2T", "distA2T"]:
+            # tunnel area; unpacked once, not per frame
             (x1, y1), (x2, y2) = tunnel
+        if proc2run in ["distP2T", "distA2T"]:
             tunnelCt = (int(x1 + (x2-x1)/2), int(y1 + (y2-y1)/2))
+            tunnelCt = np.array(tunnelCt, dtype=np.float32)
 
         if proc2run in ["intensityP", "intensityPABR", 
                         "spAHeatmapP", "spAHeatmapPABR"]:
             w = wx.FindWindowByName(f'antLen_txt', main.panel["ml"])
             aLen = str2num(widgetValue(w), 'int')
+            aLen2 = aLen * aLen # squared; compared to squared distances
 
         ### get hours to ignore & process
         h2p = {}
@@ -658,38 +972,39 @@ class ProcAnVidRslt:
             if w is None: h2p[k] = 0
             else: h2p[k] = str2num(widgetValue(w), 'float')
          
-        firstDT = get_datetime(timestamp[0])
+        firstI = 0 # index of the first timestamp to count elapsed hours
         if "before" in fnK and h2p["h2proc"] > 0:
         # this data file was recorded before an experimental treatment, &
         # there's a h2proc limit
         # (For 'before' video, h2proc goes backward from the end (treatment))
-            dt = get_datetime(timestamp[-1]) # datetime of the last timestamp
+            dt = tsDT[-1] # datetime of the last timestamp
             startDT = dt - timedelta(hours=h2p["h2proc"])
-            for tsi in range(len(timestamp)-2, 0, -1):
-            # go backward in timestamp
-                _dt = get_datetime(timestamp[tsi])
-                if _dt <= startDT: # reached the start-datetime
-                    if gSIdx == 0: # this is the first graph
-                        gSIdx = tsi # change the graph-start-index
-                    firstDT = copy(_dt)
-                    break
+            # the last index of timestamp at or before the start-datetime
+            #   (binary search in the sorted timestamps)
+            tsi = min(bisect_right(tsDT, startDT)-1, len(tsDT)-2)
+            if tsi > 0: # found the start-datetime
+                if gSIdx == 0: # this is the first graph
+                    gSIdx = tsi # change the graph-start-index
+                firstI = tsi
          
         is1stData = True
         gSDT = None # starting datetime of this graph
         gEIdx = -1 # data index where this graph ends
         gEDT = None # end datetime of this graph
-        # init temporary lists to bundle data for each data point
-        tBin = self.initTBin(proc2run)
+        # elapsed hours of each timestamp since the first timestamp
+        elapsedHours = ((tsSec - tsSec[firstI]) / 3600).tolist()
 
         if type(data) == list: dLen = len(data)
         elif type(data) == dict: dLen = len(data[list(data.keys())[0]])
+        # init temporary buffers to bundle data for each data point
+        tBin = self.initTBin(proc2run, max(0, dLen-gSIdx))
         for di in range(gSIdx, dLen):
             if di%1000 == 0:
                 msg = f'processing data.. [{fnK}]  {di+1}/ {dLen}'
                 q2m.put(("displayMsg", msg,), True, None)
-            dt = get_datetime(timestamp[di]) # datetime of the timestamp
+            dt = tsDT[di] # datetime of the timestamp
 
-            elapsedHour = ((dt-firstDT).total_seconds())/60/60 
+            elapsedHour = elapsedHours[di]
             
             if "after" in fnK and h2p["h2ignore"] > 0:
                 # ignore some hours at the beginning
@@ -726,35 +1041,40 @@ class ProcAnVidRslt:
                 ##### [begin] store data of this bundled data ---
                 if proc2run.startswith("intensity") or \
                   proc2run.startswith("presence"):
-                    bD.append(sum(tBin["val"])) 
+                    bD.append(int(tBin["val"][:tBin["n"]].sum())) 
                 
                 elif proc2run.startswith("spAHeatmap"):
+                    ### join point blocks of this bin into one (N, 2) array
                     if len(tBin["pts"]) > 0:
-                        ### add to heatmap array
-                        for pt in tBin["pts"]:
-                            hmArr[pt[1],pt[0]] += 1
+                        pts = np.concatenate(tBin["pts"])
+                    else:
+                        pts = np.empty((0, 2), dtype=np.int32)
+                    if len(pts) > 0:
+                        # add to heatmap array (repeated points add up)
+                        np.add.at(hmArr, (pts[:,1], pts[:,0]), 1)
                     # append all motion points
-                    bD.append(tBin["pts"])
+                    bD.append(pts)
 
                 elif proc2run.startswith("dist"):
-                    if tBin["dists"] == []:
+                    if tBin["n"] == 0:
                         bD.append(-1)
                     else:
-                        bD.append(int(np.median(tBin["dists"])))
+                        _dists = tBin["dists"][:tBin["n"]]
+                        bD.append(int(np.median(_dists)))
                 ##### [end] store data of this bundled data ---
                     
                 ##### [begin] store timestamp of this bundled data ---
                 if proc2run == "spAHeatmap":
                     if len(tBin["ts"]) > 0:
-                        _ts = tBin["ts"][0]
-                        bD_dt.append(get_datetime(_ts))
+                        bD_dt.append(tBin["ts"][0])
                 
                 else:
                     bD_dt.append(sDT)
                 ##### [end] store timestamp of this bundled data ---
                  
-                # init temporary data
-                tBin = self.initTBin(proc2run)
+                ### init temporary data
+                if "n" in tBin: tBin["n"] = 0 # reuse the buffers
+                else: tBin = self.initTBin(proc2run, 0)
                 # update starting datetime
                 sDT += dPtIntv
                 # update starting index
@@ -766,97 +1086,111 @@ class ProcAnVidRslt:
             
                 if proc2run == "intensity":
                     # store number of motions for this data bundle 
-                    tBin["val"].append(len(data[di]))
+                    tBin["val"][tBin["n"]] = len(data[di])
+                    tBin["n"] += 1
 
                 elif proc2run in ["intensityT", "presenceT"]:
-                    (x1, y1), (x2, y2) = tunnel
-                    cnt = 0
                     if proc2run == "intensityT":
-                        for x, y in data[di]:
-                            if x1 < x < x2 and y1 < y < y2: cnt += 1
+                        pts = data[di]
                     elif proc2run == "presenceT":
-                        cts = self.getCtOfBR(data[di]) # get center-points of BR
-                        for x, y in cts:
-                            if x1 < x < x2 and y1 < y < y2: cnt += 1
-                    tBin["val"].append(cnt)
+                        pts = self.getCtOfBR(data[di]) # get center-points of BR
+                    pts = np.asarray(pts, dtype=np.int32).reshape((-1, 2))
+                    # points inside the tunnel area
+                    m = (pts[:,0] > x1) & (pts[:,0] < x2) & \
+                        (pts[:,1] > y1) & (pts[:,1] < y2)
+                    tBin["val"][tBin["n"]] = int(np.count_nonzero(m))
+                    tBin["n"] += 1
                 
                 elif proc2run in ["spAHeatmap", "spAHeatmapABR"]:
                     ### store motion points
-                    _ts = timestamp[di].strip()
                     if proc2run == "spAHeatmapABR":
                     # heatmap with ant-blob-rects
                         # store center-points of ABR
-                        tBin["pts"] += self.getCtOfBR(data[di]) 
+                        tBin["pts"].append(self.getCtOfBR(data[di]))
                     else:
                     # heatmap with motion
-                        tBin["pts"] += data[di] 
+                        # store the (N, 2) array of this row as it is
+                        tBin["pts"].append(data[di])
                     if len(data[di]) > 0:
-                        tBin["ts"].append(_ts)
+                        tBin["ts"].append(dt)
 
                 elif proc2run in ["intensityP", "intensityPABR",
                                   "spAHeatmapP", "spAHeatmapPABR"]:
                 # heatmap with motion/ABR only around pupae
                     if proc2run.endswith("ABR"):
-                        if data["ant"][di] == None: mOrA = None
+                        if data["ant"][di] is None: mOrA = None
                         else: mOrA = self.getCtOfBR(data["ant"][di])
                     else:
                         mOrA = data["motion"][di]
                     brD = data["brood"][di]
-                    if None not in [mOrA, brD]:
+                    if mOrA is not None and brD is not None:
                         # center-points of brood-blob-rects 
                         bCts = self.getCtOfBR(brD)
-                        cnt = 0
-                        for mx, my in mOrA:
-                            for bx, by in bCts:
-                                dist = np.sqrt((mx-bx)**2 + (my-by)**2)
-                                if dist <= aLen:
-                                # if this motion occurred close enough
-                                #   to one of the pupae
-                                    if proc2run.startswith("intensity"):
-                                        cnt += 1
-                                    elif proc2run.startswith("spAHeatmap"):
-                                        tBin["pts"].append([mx, my])
+                        mOrA = np.asarray(mOrA, dtype=np.int32).reshape((-1,2))
+                        bCts = np.asarray(bCts, dtype=np.float32)
+                        bCts = bCts.reshape((-1, 2))
+                        if len(mOrA) > 0 and len(bCts) > 0:
+                            ### squared distances of all motion-pupa pairs;
+                            ###   a pair is counted if this motion occurred
+                            ###   close enough to the pupa
+                            _dists = cdist(mOrA.astype(np.float32), bCts,
+                                           "sqeuclidean")
+                            nClose = (_dists <= aLen2).sum(axis=1)
+                        else:
+                            nClose = np.zeros(len(mOrA), dtype=np.int64)
                         if proc2run.startswith("intensity"):
-                            tBin["val"].append(cnt)
+                            tBin["val"][tBin["n"]] = int(nClose.sum())
+                            tBin["n"] += 1
                         elif proc2run.startswith("spAHeatmap"):
-                            tBin["ts"].append(timestamp[di].strip())
+                            if nClose.any():
+                                # store each point once per close pupa
+                                tBin["pts"].append(
+                                    np.repeat(mOrA, nClose, axis=0)
+                                    )
+                            tBin["ts"].append(dt)
 
                 elif proc2run.startswith("dist2EO"):
                     cts = self.getCtOfBR(data[di]) # get center-points of BR
                     dist = 0 # sum of min. distances to each other (ants)
-                    for ctsI, pt in enumerate(cts):
-                        _cts = copy(cts)
-                        _cts.pop(ctsI) # remove the current data (pt)
-                        # calculates distances to other blob-center-points
-                        _dists = cdist([pt], _cts)  
-                        dist += np.min(_dists) # add the min. distance
-                    tBin["dists"].append(dist)
+                    if len(cts) > 1:
+                        ### distances between all blob-center-points at once;
+                        ###   the diagonal (distance to itself) is excluded
+                        cts = np.asarray(cts, dtype=np.float32)
+                        _dists = cdist(cts, cts)
+                        np.fill_diagonal(_dists, np.inf)
+                        # sum of the min. distance of each point
+                        dist = float(_dists.min(axis=1).sum())
+                    tBin["dists"][tBin["n"]] = dist
+                    tBin["n"] += 1
                 
                 elif proc2run in ["distP2T", "distA2T"]:
                     cts = self.getCtOfBR(data[di]) # get center-points of BR
-                    dists = []
-                    for pt in cts:
-                        _dist = np.sqrt((pt[0]-tunnelCt[0])**2 + \
-                                        (pt[1]-tunnelCt[1])**2)
-                        dists.append(_dist)
-                    # append mean-distance of pupae (or ants) 
-                    #   to tunnel-area-center
-                    tBin["dists"].append(np.mean(dists))
+                    cts = np.asarray(cts, dtype=np.float32).reshape((-1, 2))
+                    if len(cts) > 0:
+                        dists = np.linalg.norm(cts-tunnelCt, axis=1)
+                        # append mean-distance of pupae (or ants) 
+                        #   to tunnel-area-center
+                        tBin["dists"][tBin["n"]] = float(dists.mean())
+                        tBin["n"] += 1
                 
                 elif proc2run == "distP2A":
-                    if None not in [data["ant"][di], data["brood"][di]]:
+                    if data["ant"][di] is not None and \
+                      data["brood"][di] is not None:
                         ### get center-points of BR
                         aCts = self.getCtOfBR(data["ant"][di])
                         bCts = self.getCtOfBR(data["brood"][di])
-                        dists = []
-                        for bCt in bCts:
-                            dist2A = []
-                            for aCt in aCts:
-                                dist2A.append(np.sqrt((aCt[0]-bCt[0])**2 + \
-                                              (aCt[1]-bCt[1])**2))
-                            dists.append(min(dist2A))
-                        # append distance-mean of pupae to closest-ant 
-                        tBin["dists"].append(np.mean(dists))
+                        aCts = np.asarray(aCts, dtype=np.float32)
+                        bCts = np.asarray(bCts, dtype=np.float32)
+                        if len(aCts) > 0 and len(bCts) > 0:
+                            ### squared distances of all pupae-ant pairs;
+                            ###   sqrt only on the min. of each pupa
+                            _dists = cdist(bCts.reshape((-1, 2)),
+                                           aCts.reshape((-1, 2)),
+                                           "sqeuclidean")
+                            dists = np.sqrt(_dists.min(axis=1))
+                            # append distance-mean of pupae to closest-ant 
+                            tBin["dists"][tBin["n"]] = float(np.mean(dists))
+                            tBin["n"] += 1
 
             if di == dLen-1: # data reached the end of data
                 gEIdx = -1 # notify it reached the end
@@ -871,13 +1205,14 @@ class ProcAnVidRslt:
 
         if proc2run == "dist2EOCh":
         # post-processing for changes of values
-            pBD = [-1]
-            for i in range(1, len(bD)):
-                prev = bD[i-1]
-                curr = bD[i]
-                if prev == -1 or curr == -1: pBD.append(-1)
-                else: pBD.append(curr-prev)
-            bD = pBD
+            arr = np.asarray(bD, dtype=np.int64)
+            pBD = np.full(len(arr), -1, dtype=np.int64)
+            # change from the previous value, where neither is missing (-1)
+            valid = (arr[1:] != -1) & (arr[:-1] != -1)
+            pBD[1:][valid] = (arr[1:] - arr[:-1])[valid]
+            bD = pBD.tolist() # drawBarGraph expects a list
+            # no data; keep the sentinel of the first value
+            if len(bD) == 0: bD = [-1]
 
         return (bD, bD_dt, hmArr, gSDT, gEIdx, gEDT)
 
@@ -894,8 +1229,10 @@ class ProcAnVidRslt:
         """ 
         if DEBUG: MyLogger.info(str(locals()))
 
+        from scipy.signal import find_peaks, savgol_filter
+
         proc2run, fnK, roiK, bD, dPtIntvSec, graphW, graphH, \
-          gBg, cvFont, bD_dt, main, q2m, gSDT, gEDT = args 
+          gBg, cvFont, bD_dt, main, q2m, gSDT, gEDT, bgOpt = args 
 
         dLst = {} # temporary data to draw graph  
         dLst[proc2run] = bD 
@@ -911,21 +1248,22 @@ class ProcAnVidRslt:
             sWinLen = 3
             sPolyOrder = 2
         
-        w = wx.FindWindowByName("barGMax_txt", main.panel["ml"])
-        try: maxV = int(w.GetValue())
-        except: maxV = -1
-        if maxV == -1: maxV = max(bD)
+        maxV = bgOpt["maxV"]
+        ### data as an array & its max.; computed once
+        bDArr = np.asarray(bD)
+        bDMax = int(bDArr.max())
+        if maxV == -1: maxV = bDMax
         bdLen = len(bD)
         dayCols = int((24 * 60 * 60) / dPtIntvSec) # number of columns for a day
         if bdLen < dayCols: cols = bdLen 
         else: cols = dayCols
         if cols < graphW: p2col = int(graphW / cols) # pixel-to-column 
         else: p2col = 1
-        # get smoothed data
-        sdLst[proc2run] = savgol_filter(dLst[proc2run], 
+        # get smoothed data (filtered in float32)
+        sdLst[proc2run] = savgol_filter(bDArr.astype(np.float32), 
                                         window_length=sWinLen, 
                                         polyorder=sPolyOrder)
-        gRows = copy(graphH)
+        gRows = graphH
         if maxV == 0: yMul = 1 
         else: yMul = gRows / maxV
         img = np.zeros((gRows, bdLen*p2col, 3), dtype=np.uint8)
@@ -952,15 +1290,10 @@ class ProcAnVidRslt:
                                         #   between two continuous motion bouts.
             d4rDE["inactivitySecDt"] = {} # when the inactivity duration starts
             '''
-        ### whether to draw outlier or not
-        w = wx.FindWindowByName("outlier_chk", main.panel["ml"])
-        flagOutlier = w.GetValue() 
-        ### whether to draw smooth data-line or not
-        w = wx.FindWindowByName("smoothLine_chk", main.panel["ml"])
-        flagSmoothLine = w.GetValue() 
-        ### whether to draw peak points 
-        w = wx.FindWindowByName("peak_chk", main.panel["ml"])
-        flagDrawPeaks = w.GetValue()
+        flagOutlier = bgOpt["outlier"] # whether to draw outlier or not
+        # whether to draw smooth data-line or not
+        flagSmoothLine = bgOpt["smoothLine"]
+        flagDrawPeaks = bgOpt["peak"] # whether to draw peak points
 
         ### write some graph info 
         tx = txtW * 2 
@@ -969,14 +1302,20 @@ class ProcAnVidRslt:
         cv2.putText(img, _txt, (tx, ty), cvFont,
                     fontScale=fScale, color=fCol, thickness=fThck)
         
-        olIdx = [] # outlier indices
         for mi, mk in enumerate(dLst.keys()):
         # [multiple measures; Not being used;2024-04]
         # go through data (for when multiple measures are in the data) 
             cD = dLst[mk] # current data
-            max_cD = int(np.max(cD))
+            if cD is bD: 
+                cDArr = bDArr
+                max_cD = bDMax
+            else:
+                cDArr = np.asarray(cD)
+                max_cD = int(cDArr.max())
+            sum_cD = cDArr.sum()
             zStartedIdx = -1 # index where zero value started
             nzStartedIdx = -1 # index where non-zero value started
+            olMask = np.zeros(bdLen, dtype=bool) # outlier data points
             
             if proc2run == "intensity":
                 for k in d4rDE.keys(): # for each data keys for raw-data-output
@@ -1038,6 +1377,8 @@ class ProcAnVidRslt:
                 # * smooth_fraction: Between 0 and 1. The smoothing span. 
                 #     A larger value of smooth_fraction will 
                 #     result in a smoother curve. 
+                # package for anomaly detection
+                from tsmoothie.smoother import LowessSmoother
                 smoother = LowessSmoother(smooth_fraction=0.1, iterations=1)
                 smoother.smooth(_tmp)
                 low, up = smoother.get_intervals('prediction_interval', 
@@ -1045,41 +1386,45 @@ class ProcAnVidRslt:
                 pts = smoother.data[0]
                 upPts = up[0]
                 lowPts = low[0]
-                olIdx = []
-                for pi in range(len(pts)):
-                    if pts[pi] > upPts[pi] or pts[pi] < lowPts[pi]:
-                        olIdx.append(pi)
+                olMask = (pts > upPts) | (pts < lowPts)
                 ##### [end] outlier detection ----- 
             
             ##### [begin] draw data lines -----
-            p_dt = copy(bD_dt[0])
-            for x, val in enumerate(cD):
-                
-                if x%100 == 0:
-                    msg = "drawing data-point %i/ %i"%(x, bdLen)
-                    q2m.put(("displayMsg", msg,), True, None)
-
-                _x1 = x * p2col
+            msg = "drawing %i data-points.."%(bdLen)
+            q2m.put(("displayMsg", msg,), True, None)
+
+            ### draw hour-lines;
+            ###   a line is drawn at the first data point, which is 
+            ###   one hour or more later than the previous line
+            dtSec = [(dt-bD_dt[0]).total_seconds() for dt in bD_dt]
+            hlX = [] # x of hour-lines
+            x = bisect_left(dtSec, 3600)
+            while x < bdLen:
+                hlX.append(x * p2col)
+                x = bisect_left(dtSec, dtSec[x]+3600, x+1)
+            if len(hlX) > 0:
+                ### draw all hour-lines at once
+                hlX = np.asarray(hlX, dtype=np.int32)
+                lines = np.zeros((len(hlX), 2, 1, 2), dtype=np.int32)
+                lines[:,:,0,0] = hlX.reshape((-1, 1))
+                lines[:,1,0,1] = gRows
+                cv2.polylines(img, list(lines), False, (127,127,127), 1)
 
+            ''' [[!! currently (2024-03-15) not using !!]]
+            for x, val in enumerate(cD):
                 c_dt = bD_dt[x]
-                if c_dt - p_dt >= timedelta(hours=1):
-                    ### draw hour-line
-                    cv2.line(img, (_x1, 0), (_x1, gRows), (127,127,127), 1)
-                    p_dt = copy(c_dt)
-
-                ''' [[!! currently (2024-03-15) not using !!]]
                 if proc2run == "intensity":
                     ##### [begin] store motion bout data -----
                     if val == 0:
                     # zero value
                         # store zero starting index
-                        if zStartedIdx == -1: zStartedIdx = copy(x)
+                        if zStartedIdx == -1: zStartedIdx = x
 
                         if nzStartedIdx != -1:
                         # there were some preceding non zero values
                             ### store activity bout duration 
                             _zST = bD_dt[nzStartedIdx]
-                            _zET = copy(c_dt) 
+                            _zET = c_dt 
                             _et = (_zET-_zST).total_seconds()
                             d4rDE["mBoutSec"][mk].append(_et)
                             d4rDE["mBoutSecDt"][mk].append(_zST)
@@ -1087,13 +1432,13 @@ class ProcAnVidRslt:
                     else:
                     # non-zero value
                         # store non-zero starting index
-                        if nzStartedIdx == -1: nzStartedIdx = copy(x)
+                        if nzStartedIdx == -1: nzStartedIdx = x
 
                         if zStartedIdx != -1:
                         # there were some preceding zero values
                             ### store inactivity duration 
                             _zST = bD_dt[zStartedIdx]
-                            _zET = copy(c_dt)
+                            _zET = c_dt
                             _et = (_zET-_zST).total_seconds()
                             d4rDE["inactivitySec"][mk].append(_et)
                             d4rDE["inactivitySecDt"][mk].append(_zST)
@@ -1101,34 +1446,26 @@ class ProcAnVidRslt:
                     ##### [end] store motion bout data -----
                 '''
 
-                y = gRows - int(val * yMul)
-                sy = gRows - int(sdLst[mk][x] * yMul) # y of smoothed data
-                _x2 = _x1 + p2col
-                
-                ### draw data line
-                _col = (150, 150, 150)
-                if len(olIdx) > 0: # there's outlier
-                    if x == olIdx[0]: # outlier index matches
-                        # different color for outlier data point
-                        _col = (0,0,255)
-                        olIdx.pop(0)
-                if p2col == 1:
-                    cv2.line(img, (_x1, y), (_x1, gRows), _col, 1)  
-                else:
-                    cv2.rectangle(img, (_x1, y), (_x2, gRows), 
-                                  _col, -1)
-
-                if flagSmoothLine and x > 0:
-                    _col = self.gC[mi]
-                    # draw smoothed line
-                    cv2.line(img, (px, psy), (_x1, sy), _col, 1) 
-
-                px = copy(_x1)
-                py = copy(y)
-                psy = copy(sy)
+            ### draw data bars
+            ys = gRows - (cDArr * yMul).astype(np.int32)
+            ys = np.clip(ys, 0, gRows) # y of the top of each bar
+            # top row & outlier flag of the bar in each pixel column
+            colY = np.repeat(ys, p2col)
+            colOl = np.repeat(olMask, p2col)
+            barMask = np.arange(gRows).reshape((-1, 1)) >= colY
+            img[barMask & ~colOl] = (150, 150, 150)
+            # different color for outlier data point
+            img[barMask & colOl] = (0, 0, 255)
+
+            if flagSmoothLine:
+                ### draw smoothed line
+                sy = gRows - (sdLst[mk] * yMul).astype(np.int32)
+                pts = np.stack([np.arange(bdLen)*p2col, sy], axis=1)
+                pts = pts.astype(np.int32).reshape((-1,1,2))
+                cv2.polylines(img, [pts], False, self.gC[mi], 1)
             ##### [end] draw data lines ----- 
             
-            syArr = np.asarray(sdLst[mk])
+            syArr = sdLst[mk]
             # determine value for prominence
             mm = np.std(syArr[syArr>0])
             #cv2.line(img, (0, gRows-mm), (bdLen-1, gRows-mm), (0,0,0), 1)
@@ -1137,18 +1474,24 @@ class ProcAnVidRslt:
             prevPeakTime = None
             pmLen = max(1, int(min(gRows,bdLen)*0.03)) # peak marker len
             pmThck = max(1, int(pmLen*0.2)) # peak marker line thickness
+            if flagDrawPeaks and len(peaks[mk]) > 0:
+                ### triangle markers of all peaks; (n-peaks, 3, 1, 2)
+                _pk = peaks[mk]
+                ys = gRows - (sdLst[mk][_pk] * yMul).astype(np.int32)
+                xs = (_pk * p2col).astype(np.int32)
+                tris = np.zeros((len(_pk), 3, 1, 2), dtype=np.int32)
+                tris[:,:,0,0] = xs.reshape((-1, 1))
+                tris[:,1,0,0] -= int(pmLen/2)
+                tris[:,2,0,0] += int(pmLen/2)
+                tris[:,:,0,1] = ys.reshape((-1, 1))
+                tris[:,1:,0,1] -= pmLen
+                #cv2.polylines(img, list(tris), True, self.gC[mi], pmThck)
+                # fill each triangle on its own; a single fillPoly call 
+                #   would leave overlaps of adjacent markers unfilled
+                for tri in tris:
+                    cv2.fillConvexPoly(img, tri, self.gC[mi])
+            ''' [[!! currently (2024-03-15) not using !!]]
             for peak in peaks[mk]:
-                y = gRows - int(sdLst[mk][peak] * yMul)
-                _peak = peak * p2col
-                pts = np.array([[_peak, y], 
-                                [_peak-int(pmLen/2), y-pmLen],
-                                [_peak+int(pmLen/2), y-pmLen]], np.int32)
-                pts = pts.reshape((-1,1,2))
-                if flagDrawPeaks:
-                    #cv2.polylines(img, [pts], True, self.gC[mi], pmThck)
-                    cv2.fillPoly(img, [pts], self.gC[mi])
-                ###
-                ''' [[!! currently (2024-03-15) not using !!]]
                 currDT = bD_dt[peak]
                 if proc2run == "intensity" and prevPeakTime is not None:
                     d4rDE["peakIntvSecDt"][mk].append(bD_dt[peak])
@@ -1161,7 +1504,7 @@ class ProcAnVidRslt:
             _txt = "" 
             if len(dLst) > 1: _txt = f' [{mk[:3]}]'
             _txt += f' max: {max_cD}'
-            _txt += f', sum: {np.sum(cD)/1000:.1f}k'
+            _txt += f', sum: {sum_cD/1000:.1f}k'
             _txt += f', peaks: {len(peaks[mk])}'
             ty += txtH + txtBl + 5
             cv2.putText(img, _txt, (tx, ty), cvFont, fontScale=fScale,
@@ -1174,7 +1517,7 @@ class ProcAnVidRslt:
         maxVal = []
         if type(bD) == list:
             ks = [proc2run]
-            maxVal.append(np.max(bD))
+            maxVal.append(bDMax)
             dLen = len(bD)
         elif type(bD) == dict: # might have multiple data lists
         # In this case, dictionary-key will be the data column
@@ -1191,7 +1534,8 @@ class ProcAnVidRslt:
         for mi, mk in enumerate(dLst.keys()): _dtype.append((mk, bdType[mi]))
         rD = np.zeros(dLen, dtype=_dtype) # initiate array
         #rD1 = np.zeros(dLen, dtype=_dtype) # initiate array
-        rD["datetime"] = np.array([str(x) for x in bD_dt])
+        # ISO-8601 strings; converted in NumPy, not per datetime object
+        rD["datetime"] = np.asarray(bD_dt, dtype="datetime64[us]").astype("U26")
         #rD1["datetime"] = rD["datetime"] 
         for mi, mk in enumerate(dLst.keys()):
             rD[mk] = np.array(dLst[mk], dtype=bdType[mi])
@@ -1249,6 +1593,8 @@ class ProcAnVidRslt:
         """ 
         if DEBUG: MyLogger.info(str(locals()))
 
+        from scipy.signal import find_peaks, welch
+
         proc2run, main, bData, bD_dt, dPtIntvSec, graphW, graphH, gBg, \
           cvFont, fsPeriod = args
 
@@ -1266,18 +1612,21 @@ class ProcAnVidRslt:
         if psdLen == "entire input data":
             psdDI = [[0, len(bData)-1]]
         else:
-            psdDI = [[0, -1]]
+            psdDI = []
             if psdLen.endswith(" d"):
                 thr = timedelta(days=int(psdLen.replace(" d","")))
             elif psdLen.endswith(" h"):
                 thr = timedelta(hours=int(psdLen.replace(" h","")))
-            for i, dt in enumerate(bD_dt):
-                if i == 0: _bDT = copy(dt) # store beginning datetime
-                if (dt-_bDT) > thr: # time for a PSD passed
-                    psdDI[-1][1] = i-1 # store end index for PSD
-                    psdDI.append([i, -1]) # store beginning index
-                    _bDT = copy(dt) # new beginning datetime
-            if psdDI[-1][1] == -1: psdDI.pop(-1)
+            thrSec = thr.total_seconds()
+            dtSec = [(dt-bD_dt[0]).total_seconds() for dt in bD_dt]
+            i0 = 0 # beginning index
+            while i0 < len(dtSec):
+                # first index, of which time is over 'thr' since i0
+                i1 = bisect_right(dtSec, dtSec[i0]+thrSec, i0)
+                # the last PSD, which did not reach 'thr', is dropped
+                if i1 == len(dtSec): break
+                psdDI.append([i0, i1-1]) # store beginning & end index
+                i0 = i1
         if len(psdDI) == 0:
             retMsg = "!!! ERROR:: No data indices are found for PSD"
 
@@ -1296,13 +1645,15 @@ class ProcAnVidRslt:
                                                  thresholdPixels=_thP,
                                                  thick=fThck)
 
+        # bundled data as an array, converted once for all PSDs
+        bDataArr = np.ascontiguousarray(bData, dtype=np.float32)
         for psdi in range(len(psdDI)):
         # go through each PSD
             ### get data for PSD
             idx0, idx1 = psdDI[psdi]
-            psdData = np.asarray(bData[idx0:idx1+1])
-            if len(psdData) < psdNPerSeg: continue
-            psdData -= round(np.mean(psdData))
+            if idx1+1-idx0 < psdNPerSeg: continue
+            psdData = bDataArr[idx0:idx1+1].copy()
+            psdData -= psdData.mean()
             _txt = "begin:%s, end:%s"%(bD_dt[idx0], bD_dt[idx1])
             _txt += ", dataLen:%i"%(len(psdData))
             _txt += ", %.3f"%(len(psdData)/psdNPerSeg)
@@ -1399,10 +1750,11 @@ class ProcAnVidRslt:
                     _idx = round(fs[i] / (inputFS/2) * graphW)
                     fsPeriod[_idx] = _txt
                     _half = prevFPI+1 + int((_idx-prevFPI)/2)
-                    for _i in range(prevFPI+1, _half):
-                        fsPeriod[_i] = prevFPTxt 
-                    for _i in range(_half, _idx):
-                        fsPeriod[_i] = _txt 
+                    ### fill the pixels between the two frequencies
+                    fsPeriod.update(
+                        dict.fromkeys(range(prevFPI+1, _half), prevFPTxt)
+                        )
+                    fsPeriod.update(dict.fromkeys(range(_half, _idx), _txt))
                     prevFPI = _idx
                     prevFPTxt = _txt
                 ### draw line
@@ -1417,20 +1769,25 @@ class ProcAnVidRslt:
             mm = int(np.std(pxx4draw))
             peaks, _ = find_peaks(pxx4draw, prominence=mm)
             pmLen = max(2, int(min(graphW, graphH)*0.01)) # peak marker len
-            for peak in peaks:
-                ### draw peak marker
-                x = mg["l"] + round(fs[peak]/inputFS*2*graphW)
-                y = zeroY - round(pxx4draw[peak])
-                pts = np.array([[x, y], 
-                                [x-int(pmLen/2), y-pmLen],
-                                [x+int(pmLen/2), y-pmLen]], np.int32)
-                pts = pts.reshape((-1,1,2))
-                cv2.polylines(img, [pts], True, color["data"], 1)
-                ### draw its value
-                _txt = fsPeriod[round(fs[peak]/(inputFS/2)*graphW)]
-                cv2.putText(img, _txt, (x+int(pmLen/2), y), cvFont, 
-                            fontScale=fScale, color=color["txt"], 
-                            thickness=fThck)
+            if len(peaks) > 0:
+                ### draw all peak markers; (n-peaks, 3, 1, 2)
+                xs = mg["l"] + np.round(fs[peaks]/inputFS*2*graphW)
+                xs = xs.astype(np.int32)
+                ys = zeroY - np.round(pxx4draw[peaks]).astype(np.int32)
+                tris = np.zeros((len(peaks), 3, 1, 2), dtype=np.int32)
+                tris[:,:,0,0] = xs.reshape((-1, 1))
+                tris[:,1,0,0] -= int(pmLen/2)
+                tris[:,2,0,0] += int(pmLen/2)
+                tris[:,:,0,1] = ys.reshape((-1, 1))
+                tris[:,1:,0,1] -= pmLen
+                cv2.polylines(img, list(tris), True, color["data"], 1)
+                ### draw their values
+                fsIdx = np.round(fs[peaks]/(inputFS/2)*graphW).astype(int)
+                for pi in range(len(peaks)):
+                    _txt = fsPeriod[int(fsIdx[pi])]
+                    _pt = (int(xs[pi])+int(pmLen/2), int(ys[pi]))
+                    cv2.putText(img, _txt, _pt, cvFont, fontScale=fScale, 
+                                color=color["txt"], thickness=fThck)
             ##### [end] drawing -----
 
         return img, fsPeriod, mg, retMsg 
@@ -1449,11 +1806,13 @@ class ProcAnVidRslt:
         if DEBUG: MyLogger.info(str(locals()))
 
         fnK, hmArr, main, prnt, bD, bD_dt, cvFont, hmRad, \
-          gSDT, gEDT, q2m, fImg = args
+          gSDT, gEDT, q2m, fImg, hmOpt = args
 
-        if np.sum(hmArr) == 0:
+        hmMax = int(hmArr.max()) # max. count; computed once
+        if hmMax == 0: # no counts (hmArr is unsigned)
             img = np.zeros(fImg.shape, np.uint8)
-            rawData = dict(heatMapArr=hmArr)
+            # copy; hmArr is reused in the next drawGraph
+            rawData = dict(heatMapArr=hmArr.copy())
             return img, rawData 
 
         rows, cols = hmArr.shape[:2]
@@ -1468,10 +1827,8 @@ class ProcAnVidRslt:
         ### determine heatmap level ranges and its colors
         hmLvlRngs = {}
         hmCols = {}
-        w = wx.FindWindowByName("heatmapMax_txt", main.panel["ml"])
-        try: hmMaxVal = int(w.GetValue())
-        except: hmMaxVal = -1
-        if hmMaxVal == -1: hmMaxVal = np.max(hmArr) 
+        hmMaxVal = hmOpt["maxV"]
+        if hmMaxVal == -1: hmMaxVal = hmMax
         numHMR = min(5, hmMaxVal) # number of heatmap ranges
         intv = hmMaxVal / numHMR
         step = numHMR * 0.4
@@ -1481,8 +1838,10 @@ class ProcAnVidRslt:
             _min = int(np.ceil(intv*(i))) + 1
             _max = intv*(i+1) + 1
             key = "%i - %i"%(_min, _max-1)
-            # set heatmap level range
-            hmLvlRngs[key] = (_min, _max)
+            # set heatmap level range;
+            #   integer end (the same for integer counts), so that
+            #   ranges are contiguous for binning in drawHeatmapImg
+            hmLvlRngs[key] = (_min, int(np.ceil(intv*(i+1))) + 1)
             ### set color for this heatmap range
             if i < step: # 1st/2nd: red
                 c = int(_def+ (i+1) * (_stepVal/step))
@@ -1493,12 +1852,9 @@ class ProcAnVidRslt:
             else: # last: white
                 hmCols[key] = (255, 255, 255)
 
-        _lbl1 = str(gSDT).split(".")[0] # remove microseconds from datetime
-        _lbl2 = str(gEDT).split(".")[0] 
-        _lbl1 = _lbl1.replace(":", "").replace("-", "")
-        _lbl2 = _lbl2.replace(":", "").replace("-", "")
-        _lbl1 = _lbl1.replace(" ","T")
-        _lbl2 = _lbl2.replace(" ","T")
+        # remove microseconds from datetime & make compact labels
+        _lbl1 = str(gSDT).split(".")[0].translate(DT_LBL_TBL)
+        _lbl2 = str(gEDT).split(".")[0].translate(DT_LBL_TBL)
         titleLbl = f'[{fnK}] {_lbl1}_{_lbl2}'
         titleLbl += f' set-max.: {hmMaxVal}'
         msg = "generating heatmap image.. [%s]"%(titleLbl)
@@ -1508,19 +1864,22 @@ class ProcAnVidRslt:
         baseImg = self.makeBaseImg(fImg) 
         img = baseImg.copy()
         ### convert data type if applicable
-        if np.max(hmArr) < np.iinfo(np.uint8).max:
+        if hmMax < np.iinfo(np.uint8).max:
             hmArr = hmArr.astype(np.uint8)
-        elif np.max(hmArr) < np.iinfo(np.uint16).max:
+        elif hmMax < np.iinfo(np.uint16).max:
             hmArr = hmArr.astype(np.uint16)
+        else:
+            # copy; hmArr is reused in the next drawGraph
+            hmArr = hmArr.copy()
         ### draw heatmap 
         img = prnt.drawHeatmapImg(hmArr, (0,0,0), img, hmLvlRngs, 
                                   hmCols, titleLbl, hmRad)
 
-        chk = wx.FindWindowByName("saveHMVideo_chk", main.panel["ml"])
-        if chk.GetValue():
+        if hmOpt["saveVideo"]:
             q2m.put(("displayMsg", "making heatmap video..",), True, None)
-            args = (main.inputFP, fnK, copy(fImg), bD, bD_dt, cvFont, fThck, \
-                    fScale, txtW, txtH, txtBl)
+            # (fImg is not modified in makeHeatmapVideo)
+            args = (main.inputFP, fnK, fImg, bD, bD_dt, cvFont, fThck, \
+                    fScale, txtW, txtH, txtBl, hmOpt["videoFPS"])
             # make heatmap video file
             self.makeHeatmapVideo(args)
 
@@ -1544,7 +1903,7 @@ class ProcAnVidRslt:
         flag = "gradual" # gradual/ flash/ ani
 
         inputFP, fnK, fImg, bData, bD_dt, \
-          cvFont, fThck, fScale, txtW, txtH, txtBl = args
+          cvFont, fThck, fScale, txtW, txtH, txtBl, videoFPS = args
 
         fn = f'heatmap_{fnK}_{get_time_stamp()}.avi'
         _fp0, _fp1 = path.split(inputFP)
@@ -1555,9 +1914,6 @@ class ProcAnVidRslt:
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
         #rad = int(round(img.shape[0] * 0.002))
         #col = (255,255,0)
-        w = wx.FindWindowByName('heatMapVideoFPS_cho', 
-                                self.mainFrame.panel["ml"])
-        videoFPS = int(w.GetString(w.GetSelection())) 
         '''
         ### cut a part of data to make the video
         _i0 = 25000; _i1 = 25300
@@ -1583,67 +1939,122 @@ class ProcAnVidRslt:
         
         if flag in ["gradual", "ani"] and mPtRad > 0:
             tmpGrey = np.zeros(tuple(fSh[:2]), dtype=np.uint8)
-
-        dLen = []
-        for roiK in bData.keys(): dLen.append(len(bData[roiK]))
-        dLen = max(dLen)
-        for fi in range(dLen):
-            if flag != "ani" and fi%10 == 0:
-                msg = f'writing video {fi+1}/ {dLen}'
-                print("\r", msg, end="          ", flush=True)
+            ### offsets of pixels in a filled circle (motion point);
+            ###   drawn once with cv2.circle, then stamped at all points
+            _d = mPtRad*2 + 1
+            stamp = np.zeros((_d, _d), dtype=np.uint8)
+            cv2.circle(stamp, (mPtRad, mPtRad), mPtRad, 1, -1)
+            stampYX = np.argwhere(stamp > 0) - mPtRad # (n-pixels, 2)
+        if flag != "flash":
+            # uint8 buffer of 'grey', reused in every frame
+            greyU8 = np.empty(tuple(fSh[:2]), dtype=np.uint8)
+
+        def writeFrames(q2w, video_rec, wErr):
+        # function to write frames into video in a separate thread,
+        #   so that encoding does not block drawing the next frame
+            try:
+                while True:
+                    frame = q2w.get(True, None)
+                    if frame is None: break
+                    video_rec.write(frame)
+            except Exception as e:
+                wErr.append(e) # store it to raise in this thread
+        def putFrame(item):
+        # put an item into the writer queue while the writer thread is alive;
+        #   returns False when the writer thread stopped
+            while wThrd.is_alive():
+                try:
+                    q2w.put(item, True, 0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        wErr = [] # exception raised in the writer thread
+        q2w = queue.Queue(maxsize=8) # frames to write
+        wThrd = Thread(target=writeFrames, args=(q2w, video_rec, wErr,))
+        wThrd.start()
+
+        try:
+            dLen = max(len(_bD) for _bD in bData.values()) # number of frames
+            ### datetime string of each frame;
+            ###   from the first ROI, which has data at the frame index
+            dtStrs = [""] * dLen
+            _n0 = 0 # number of frames which already have the string
+            for roiK in bData.keys():
+                _n = len(bD_dt[roiK])
+                if _n > _n0:
+                    dtStrs[_n0:_n] = [str(dt) for dt in bD_dt[roiK][_n0:_n]]
+                    _n0 = _n
+            for fi in range(dLen):
+                if flag != "ani" and fi%10 == 0:
+                    msg = f'writing video {fi+1}/ {dLen}'
+                    print("\r", msg, end="          ", flush=True)
             
-            if flag == "flash": frame = baseImg.copy()
+                # reset the frame buffer
+                if flag == "flash": np.copyto(frame, baseImg)
             
-            for roiK in bData.keys():
-                _bD = bData[roiK][fi]
+                for roiK in bData.keys():
+                    _bD = bData[roiK][fi]
             
-                ### draw motion points 
-                if flag == "gradual":
-                # in accumulation with slow decrease
-                    grey -= dec
-                    if mPtRad > 0: tmpGrey[:,:] = 0
-                    for x, y in _bD:
-                        #x -= ssROI[0]
+                    ### draw motion points 
+                    if flag == "gradual":
+                    # in accumulation with slow decrease
+                        grey -= dec
+                        _bD = np.asarray(_bD, dtype=np.int32).reshape((-1, 2))
                         if mPtRad == 0:
-                            grey[y,x] += inc
+                            # increase at each point (repeated points add up)
+                            np.add.at(grey, (_bD[:,1], _bD[:,0]), inc)
                         else:
-                            cv2.circle(tmpGrey, (x, y), mPtRad, inc, -1)
-                    if mPtRad > 0: grey += tmpGrey
-                    grey[grey>255] = 255
-                    grey[grey<0] = 0
+                            tmpGrey[:,:] = 0
+                            ### stamp circles at all points
+                            ys = (_bD[:,1:2] + stampYX[:,0]).ravel()
+                            xs = (_bD[:,0:1] + stampYX[:,1]).ravel()
+                            _in = (ys >= 0) & (ys < fSh[0]) & \
+                                  (xs >= 0) & (xs < fSh[1])
+                            tmpGrey[ys[_in], xs[_in]] = inc
+                            grey += tmpGrey
+                        np.clip(grey, 0, 255, out=grey)
                 
-                elif flag == "flash":
-                    for x, y in _bD:
+                    elif flag == "flash":
+                        _bD = np.asarray(_bD, dtype=np.int32).reshape((-1, 2))
                         if mPtRad == 0:
-                            frame[y,x] = (255, 255, 255)
+                            frame[_bD[:,1], _bD[:,0]] = 255
                         else:
-                            cv2.circle(frame, (x, y), mPtRad, (255,255,255), -1)
-                    if mPtRad > 0: grey += tmpGrey
-                    grey[grey>255] = 255
-                    grey[grey<0] = 0
+                            for x, y in _bD:
+                                cv2.circle(frame, (x, y), mPtRad, 
+                                           (255,255,255), -1)
+                        if mPtRad > 0: grey += tmpGrey
+                        np.clip(grey, 0, 255, out=grey)
 
                 if flag != "flash":
-                    frame = baseImg.copy()
-                    frame += cv2.cvtColor(grey.astype(np.uint8), 
-                                          cv2.COLOR_GRAY2BGR)
-
-            if flag != "ani":
-                dtStr = ""
-                for roiK in bData.keys():
-                    if fi < len(bD_dt[roiK]):
-                        dtStr = str(bD_dt[roiK][fi])
-                        break
-                if dtStr != "":
-                    tx = int(frame.shape[1]/2) - int(txtW*19/2)
-                    ty = txtH + txtBl + 5
-                    # write datetime
-                    cv2.putText(frame, str(bD_dt[roiK][fi]), (tx, ty), cvFont, 
-                        fontScale=fScale, color=(255,255,255), thickness=fThck)
+                    if grey.any():
+                        ### composite once per frame, after all ROIs are drawn;
+                        ###   into the same 'frame' buffer in every frame
+                        greyU8[:,:] = grey
+                        cv2.cvtColor(greyU8, cv2.COLOR_GRAY2BGR, dst=frame)
+                        cv2.add(baseImg, frame, dst=frame)
+                    else:
+                        # no heat (yet or any more); the frame is the base image
+                        #   (copied to clear the datetime of the previous frame)
+                        np.copyto(frame, baseImg)
+
+                if flag != "ani":
+                    dtStr = dtStrs[fi]
+                    if dtStr != "":
+                        tx = int(frame.shape[1]/2) - int(txtW*19/2)
+                        ty = txtH + txtBl + 5
+                        # write datetime
+                        cv2.putText(frame, dtStr, (tx, ty), cvFont, 
+                                    fontScale=fScale, color=(255,255,255), 
+                                    thickness=fThck)
                 
-            # write this frame into video
-            video_rec.write(frame)
-
-        video_rec.release()
+                # send (a copy of) this frame to the writer thread
+                if not putFrame(frame.copy()): break # writer stopped
+        finally:
+            putFrame(None) # notify the end of frames
+            wThrd.join()
+            video_rec.release()
+        if wErr: raise wErr[0]
 
     #---------------------------------------------------------------------------
 
@@ -1663,10 +2074,9 @@ class ProcAnVidRslt:
         img = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, 
                                iterations=3) # decrease minor features 
         img = cv2.Canny(img, 40, 80)
-        img = img.astype(np.int16)
-        img -= 230
-        img[img<0] = 0
-        img = cv2.cvtColor(img.astype(np.uint8), cv2.COLOR_GRAY2BGR)
+        # saturating subtraction (negative values become zero)
+        img = cv2.subtract(img, 230)
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
 
         return img
 
@@ -1677,18 +2087,16 @@ class ProcAnVidRslt:
         detected by color)
         
         Args:
-            args (list): List of rect-points 
+            pts (numpy.ndarray): Rect-points; (N, 8) array of four x,y
          
         Returns:
-            cts (list): List of center-points 
+            cts (numpy.ndarray): (N, 2) array of center-points 
         """ 
         if DEBUG: MyLogger.info(str(locals()))
 
-        cts = [] # list of center-point of blobs 
-        for x1, y1, x2, y2, x3, y3, x4, y4 in pts:
-            xMean = int(np.mean([x1, x2, x3, x4]))
-            yMean = int(np.mean([y1, y2, y3, y4]))
-            cts.append((xMean, yMean))
+        pts = np.asarray(pts).reshape((-1, 4, 2))
+        # mean of four points of each rect; truncated as int() did
+        cts = pts.mean(axis=1).astype(np.int32)
         return cts
 
     #---------------------------------------------------------------------------
@@ -38,6 +38,9 @@ DEBUG = False
 
 #csv.field_size_limit(sys.maxsize)
 csv.field_size_limit(int(ctypes.c_ulong(-1).value//2))
+# translation table to turn motionPts such as '(x/y)(x/y)' into 
+#   white-space separated numbers
+MPTS_SEP_TBL = str.maketrans("()/", "   ")
 
 #===============================================================================
 
@@ -59,7 +62,8 @@ class ProcAntOS:
         self.parent = parent
 
         self.v = dict(camIdx = None, camIdx4i = None, imgFiles = None,
-                      data = None, ci = None, keys = None, temperature = None)
+                      data = None, ci = None, cols = None, keys = None, 
+                      temperature = None)
         ##### [end] setting up attributes on init. -----
 
     #---------------------------------------------------------------------------
@@ -108,14 +112,15 @@ class ProcAntOS:
        
         if len(rsltFP) == 0: return False
         data = []
-        _d = []
         for i, rfp in enumerate(rsltFP):
             msg = "Loading CSV files.. %i/ %i"%(i+1, len(rsltFP))
             q2m.put(("displayMsg", msg), True, None)
-            _d = list(csv.reader(open(rsltFP[i], "r"))) # load CSV data
-            if i == 0: dataHeader = copy(_d[0]) # store csv header
-            _d.pop(0)
-            data += _d 
+            ### stream rows of CSV file with a large read buffer
+            with open(rfp, "r", newline="", buffering=1<<20) as fh:
+                rdr = csv.reader(fh)
+                header = next(rdr) # csv header
+                if i == 0: dataHeader = header # store csv header
+                data.extend(rdr) # load CSV data
 
         '''
         ### !!! TEMPORARY for flatChamber data (202107) !!! -----
@@ -131,49 +136,94 @@ class ProcAntOS:
             key = dataHeader[_ci].strip()
             ci[key] = _ci 
 
-        ### store keys
-        keys = []
-        for d in data: 
-            keys.append(d[ci["Key"]].strip())
-            # break loop when it's a new data-set (keys are rotated once)
-            if len(keys) > 1 and keys[0] == keys[-1]: break
-
         ### Remove motionPts 
         ###   where too many motions points are recorded in a single 
         ### data line (false motion due to lighting condition changes)
         msg =  "Removing motionPts by external causes ..."
         q2m.put(("displayMsg", msg), True, None)
-        lst = [] # temporary list of number of motion-points
-        idx = [] # index of data
-        for di in range(len(data)):
-            d = data[di]
-            k = d[ci["Key"]].strip()
-            if k == "motionPts":
-                v = d[ci["Value"]]
-                lst.append(len(v.split(")(")))
-                idx.append(di)
-        lst = np.asarray(lst) 
+        # stripped key of each data line
+        keyArr = np.asarray([d[ci["Key"]].strip() for d in data])
+        # indices of motionPts data lines
+        mpIdx = np.flatnonzero(keyArr == "motionPts").tolist()
+        # number of motion-points in each motionPts data line
+        lst = np.asarray([data[di][ci["Value"]].count(")(")+1 \
+                            for di in mpIdx], dtype=np.int32)
         w = wx.FindWindowByName("maxMotionThr_txt", main.panel["ml"])
         try: thr = int(w.GetValue())
         except: thr = 100
-        idxI = list(np.where(lst >= thr)[0]) # index of idx where too many
-                                             # motion points are recorded
-        for i, _idx in enumerate(idxI):
-            if i % 100 == 0:
-                p = (i+1) / len(idxI) * 100 
-                msg =  "Validating motionPts (%.1f %%)..."%(p)
-                q2m.put(("displayMsg", msg), True, None)
-            idx2pop = idx[_idx]-i
-            print("[DROP] ", data[idx2pop][1]) # print timestamp of dropped data
-            data.pop(idx2pop)
+        # indices of data where too many motion points are recorded
+        dropIdx = np.asarray(mpIdx, dtype=np.int64)[lst >= thr]
+        for di in dropIdx:
+            print("[DROP] ", data[di][1]) # print timestamp of dropped data
+        ### drop them with a mask in a single pass
+        keep = np.ones(len(data), dtype=bool)
+        keep[dropIdx] = False
+        data = [d for d, _keep in zip(data, keep.tolist()) if _keep]
+        keyArr = keyArr[keep]
         msg = "Motion points Mean: %i"%(int(np.mean(lst)))
         msg += ", Median: %i"%(int(np.median(lst)))
         msg += ", Max: %i"%(int(np.max(lst)))
-        msg += ", Number of dropped frames: %i"%(len(idxI))
+        msg += ", Number of dropped frames: %i"%(len(dropIdx))
         print(msg)
 
+        ### store stripped key, value and timestamp columns once, 
+        ###   so that drawing graphs doesn't index & strip each CSV row 
+        ###   again whenever it bundles data.
+        cols = dict(key=keyArr,
+                    value=[d[ci["Value"]].strip() for d in data],
+                    ts=[d[ci["Timestamp"]].strip() for d in data])
+
+        ### parse motion points of all motionPts data lines at once, 
+        ###   and store (n, 2) array of each line
+        mpIdx = np.flatnonzero(keyArr == "motionPts").tolist()
+        mpStr = " ".join([cols["value"][di] for di in mpIdx])
+        mpArr = np.fromstring(mpStr.translate(MPTS_SEP_TBL), dtype=np.int32,
+                              sep=" ")
+        nPts = lst[lst < thr] # number of points in each remaining line
+        # number of '/' in each line (one in each point)
+        nSep = np.asarray([cols["value"][di].count("/") for di in mpIdx], 
+                          dtype=np.int32)
+        cols["mPts"] = [None] * len(data)
+        if mpArr.size == np.sum(nPts)*2 and np.array_equal(nSep, nPts):
+            mpArr = mpArr.reshape((-1, 2))
+            mpArrLst = np.split(mpArr, np.cumsum(nPts)[:-1])
+            for di, pts in zip(mpIdx, mpArrLst): cols["mPts"][di] = pts
+        else:
+        # malformed line(s); parse each line separately
+            for di, _n in zip(mpIdx, nPts.tolist()):
+                v = cols["value"][di]
+                pts = np.fromstring(v.translate(MPTS_SEP_TBL), 
+                                    dtype=np.int32, sep=" ")
+                if pts.size != _n*2 or v.count("/") != _n:
+                    print("[MALFORMED] ", cols["ts"][di], v)
+                    # treat it as a line without motion points
+                    pts = np.empty((0, 2), dtype=np.int32)
+                cols["mPts"][di] = pts.reshape((-1, 2))
+
+        ### store keys
+        keys = []
+        for k in cols["key"]: 
+            keys.append(str(k))
+            # break loop when it's a new data-set (keys are rotated once)
+            if len(keys) > 1 and keys[0] == keys[-1]: break
+
+        ### parse each timestamp once (data lines of the same moment 
+        ###   share a timestamp, so only unique strings are parsed)
+        dtCache = {}
+        for ts in cols["ts"]:
+            if not ts in dtCache: dtCache[ts] = get_datetime(ts)
+        cols["dt"] = [dtCache[ts] for ts in cols["ts"]]
         # store the datetime of the first data 
-        self.firstDT = get_datetime(data[0][ci["Timestamp"]])
+        self.firstDT = cols["dt"][0]
+        ### store cam-index of each data line 
+        ###   (-1 when it's not a valid integer)
+        cols["camIdx"] = np.full(len(data), -1, dtype=np.int32)
+        for di, d in enumerate(data):
+            try: cols["camIdx"][di] = int(d[ci["Cam-idx"]])
+            except: pass
+        # elapsed hours of each data line since the first data
+        dtArr = np.asarray(cols["dt"], dtype="datetime64[us]")
+        cols["eH"] = ((dtArr-dtArr[0]) / np.timedelta64(1, "h")).tolist()
 
         ### store temperature data with datetime, max and min value.
         msg =  "Storing temperature data ..."
@@ -209,7 +259,8 @@ class ProcAntOS:
                    (100,255,255), (255,255,100), (255,100,255)]
         
         ret = dict(camIdx=camIdx, camIdx4i=camIdx4i, imgFiles=imgFiles,
-                   data=data, ci=ci, keys=keys, temperature=temperature)
+                   data=data, ci=ci, cols=cols, keys=keys, 
+                   temperature=temperature)
         q2m.put(("finished", ret,), True, None)
 
     #---------------------------------------------------------------------------
@@ -230,6 +281,7 @@ class ProcAntOS:
         prnt = self.parent # graph processing module (procGraph.py)
         data = self.v["data"] # list of lines in CSV result file
         ci = self.v["ci"] # column index of CSV data
+        cols = self.v["cols"] # stripped columns of CSV data
         cho = wx.FindWindowByName("camIdx_cho", main.panel["ml"])
         try: camIdx = int(cho.GetString(cho.GetSelection())) # camera index 
         except: camIdx = self.v["camIdx4i"]["roi0"]
@@ -416,27 +468,23 @@ class ProcAntOS:
                 ts = fn.split("_cam-")[0] # time-stamp of the image
                 imgDT = get_datetime(ts)
                 for di in range(rdi, len(data)):
-                    ### check whether this data belongs to the target cam-index
-                    try: _camIdx = int(data[di][ci["Cam-idx"]])
-                    except: continue
-                    if camIdx != _camIdx: continue
+                    # check whether this data belongs to the target cam-index
+                    if cols["camIdx"][di] != camIdx: continue
                     # time-stamp of this data 
-                    ts = data[di][ci["Timestamp"]].strip() 
+                    ts = cols["ts"][di]
                     # datetime of the time-stamp
-                    dt = get_datetime(ts) 
+                    dt = cols["dt"][di]
                     if dt > imgDT:
                         for _di in range(di, len(data)):
-                            _ts = data[_di][ci["Timestamp"]].strip() # timestamp
+                            _ts = cols["ts"][_di] # timestamp
                             if _ts != ts: break
-                            _key = data[_di][ci["Key"]].strip() 
-                            _value = data[_di][ci["Value"]].strip()
+                            _key = cols["key"][_di]
+                            _value = cols["value"][_di]
                             if _key == "colCent":
                                 pt = [int(_x) for _x in _value.split("/")]
                                 cv2.circle(img, tuple(pt), 10, (200,0,0), -1)
                             elif _key == "motionPts":
-                                pts = _value.strip("()").split(")(")
-                                for pt in pts:
-                                    pt = [int(_x) for _x in pt.split("/")]
+                                for pt in cols["mPts"][_di].tolist():
                                     cv2.circle(img, tuple(pt), 5, (0,0,200), -1)
                         break
                 prnt.storeGraphImg(img, main.pi["mp"]["sz"])
@@ -620,6 +668,7 @@ class ProcAntOS:
           ptoi, roiCt, locDist, hmArr, spAGrid, q2m = args
 
         main = self.mainFrame
+        cols = self.v["cols"] # stripped columns of CSV data
         ### get hours to ignore & process
         h2p = {}
         for k in ["h2ignore", "h2proc"]:
@@ -635,20 +684,24 @@ class ProcAntOS:
         if proc2run == "spAGridOFlow":
             pImg = None # for storing data image from the previous data bundle
 
+        ### boxes (x1, y1, x2, y2) of ROIs recorded by this cam-index
+        roiBoxes = []
+        for rk in roi.keys():
+            if not camIdx == self.v["camIdx4i"][rk]: continue
+            _r = roi[rk]
+            roiBoxes.append((_r[0], _r[1], _r[0]+_r[2], _r[1]+_r[3]))
+        roiBoxes = np.asarray(roiBoxes, dtype=np.int32).reshape((-1,4))
+
         dLen = len(data)
-        for di in range(gSIdx, dLen):
-            if di%1000 == 0:
+        ### indices of data recorded by the target cam-index 
+        ###   (ignore data with different cam index)
+        camDI = np.flatnonzero(cols["camIdx"][gSIdx:] == camIdx) + gSIdx
+        for i, di in enumerate(camDI.tolist()):
+            if i%1000 == 0:
                 msg = "processing data %i/ %i"%(di+1, dLen)
                 q2m.put(("displayMsg", msg,), True, None)
-            ### check whether this data belongs to the target cam-index
-            try: _camIdx = int(data[di][ci["Cam-idx"]])
-            except: continue
-            if camIdx != _camIdx: continue # ignore data with 
-                                           #   different cam index
-            ts = data[di][ci["Timestamp"]].strip() # timestamp of the data
-            dt = get_datetime(ts) # datetime of the timestamp
-
-            elapsedHour = ((dt-self.firstDT).total_seconds())/60/60 
+            dt = cols["dt"][di] # datetime of the data
+            elapsedHour = cols["eH"][di] 
             if h2p["h2ignore"] > 0:
                 # ignore some hours at the beginning
                 if elapsedHour < h2p["h2ignore"]: continue
@@ -693,6 +746,12 @@ class ProcAntOS:
                         sDT = sDT + dPtIntv
                 
                 ##### [begin] store data & TS of this bundled data ---
+                if "mx" in tBin:
+                    ### concatenate coordinate blocks of this interval 
+                    ###   into contiguous arrays
+                    mx = np.concatenate([np.empty(0, np.int32)] + tBin["mx"])
+                    my = np.concatenate([np.empty(0, np.int32)] + tBin["my"])
+
                 if proc2run in ["intensity", "intensityPSD"]:
                     _inten = sum(tBin["intensity"]) 
                     bData.append(_inten)
@@ -704,8 +763,6 @@ class ProcAntOS:
                     bData.append(sum(tBin["interactingMCluster"]))
 
                 elif proc2run == "intensityL":
-                    mx = np.asarray(tBin["mx"])
-                    my = np.asarray(tBin["my"])
                     for k in ptoi.keys():
                         if -1 in ptoi[k]:
                             bData[k].append(0) 
@@ -717,7 +774,7 @@ class ProcAntOS:
                             bData[k].append(np.sum(ptW))
 
                 elif proc2run.startswith("dist2"):
-                    if tBin["mx"] == []:
+                    if len(mx) == 0:
                         bData.append(-1)
                     else:
                         if proc2run == "dist2b":
@@ -730,20 +787,14 @@ class ProcAntOS:
                         dist = np.sqrt((_pt[0]-cx)**2 + (_pt[1]-cy)**2)
                         bData.append(int(round(dist)))
                         '''
+                        # distances of motion points to the point
+                        dists = np.sqrt((_pt[0]-mx)**2 + (_pt[1]-my)**2)
                         if proc2run in ["dist2b", "dist2c"]:
-                            dists = []
-                            for mpti, x in enumerate(tBin["mx"]):
-                                y = tBin["my"][mpti]
-                                dists.append(
-                                        np.sqrt((_pt[0]-x)**2 + (_pt[1]-y)**2)
-                                        )
-                            bData.append(int(max(dists)))
+                            bData.append(int(np.max(dists)))
                         elif proc2run == "dist2ca":
                             ### store data with all the motion points,
                             ### regardless of data-bundle-interval.
-                            for mpti, x in enumerate(tBin["mx"]):
-                                y = tBin["my"][mpti]
-                                dist = np.sqrt((_pt[0]-x)**2 + (_pt[1]-y)**2)
+                            for dist in dists.tolist():
                                 # store data
                                 bData.append(int(dist))
                                 # [*] store timestamp for this data
@@ -754,11 +805,11 @@ class ProcAntOS:
 
                 elif proc2run == "saMVec": 
                     flagNonMov = False
-                    if tBin["mx"] == []:
+                    if len(mx) == 0:
                         flagNonMov = True 
                     else:
-                        xs = np.asarray(tBin["mx"])
-                        ys = np.asarray(tBin["my"])
+                        xs = mx
+                        ys = my
                         if tBin["prevPos"] == [-1, -1]:
                             tBin["prevPos"] = [int(np.mean(xs)), 
                                                int(np.mean(ys))]
@@ -1037,8 +1088,7 @@ class ProcAntOS:
                 ### store timestamp for this data 
                 if proc2run == "spAHeatmap":
                     if len(tBin["ts"]) > 0:
-                        _ts = tBin["ts"][0]
-                        bD_dt.append(get_datetime(_ts))
+                        bD_dt.append(tBin["ts"][0])
                 else:
                     bD_dt.append(sDT)
                     if days[-1].day != sDT.day:
@@ -1065,36 +1115,32 @@ class ProcAntOS:
                 # update starting index
                 sDI = copy(di)
             ##### [end] process data of the past interval -----
-            key = data[di][ci["Key"]].strip()
-            value = data[di][ci["Value"]].strip()
+            key = cols["key"][di]
+            value = cols["value"][di]
             if key == "motionPts":
-                m_pts_str = value.strip("()").split(")(")
+                _pts = cols["mPts"][di] # (n, 2) array of motion points
                 ### get motion points which are in one of ROIs
-                m_pts = []
-                for _pt in m_pts_str:
-                    pt = [int(_x) for _x in _pt.split("/")]
-                    for rk in roi.keys():
-                        if not camIdx == self.v["camIdx4i"][rk]: continue
-                        _r = roi[rk]
-                        if _r[0] <= pt[0] <= _r[0]+_r[2] and \
-                          _r[1] <= pt[1] <= _r[1]+_r[3]:
-                            m_pts.append(pt)
-                            break
+                x = _pts[:,0:1]
+                y = _pts[:,1:2]
+                inROI = ((roiBoxes[:,0] <= x) & (x <= roiBoxes[:,2]) & \
+                         (roiBoxes[:,1] <= y) & (y <= roiBoxes[:,3])).any(axis=1)
+                mPtsArr = _pts[inROI]
+                m_pts = mPtsArr.tolist()
                 if proc2run in ["intensity", "intensityPSD"]:
                     # store number of motions for this data bundle 
                     tBin["intensity"].append(len(m_pts))
                 if proc2run.startswith("spA"):
-                    ### store motion points
-                    _ts = data[di][ci["Timestamp"]].strip()
+                    # store motion points
                     tBin["m_pts"] += m_pts
                     if proc2run == "spAHeatmap" and len(m_pts) > 0:
-                        tBin["ts"].append(_ts)
+                        # store datetime of the motion points
+                        tBin["ts"].append(dt)
                 if proc2run in ["intensityL", "dist2b", "dist2c", "dist2ca",
                                 "saMVec"]:
                     if len(m_pts) > 0:
-                        m_pts_arr = np.asarray(m_pts)
-                        tBin["mx"] += list(m_pts_arr[:,0]) 
-                        tBin["my"] += list(m_pts_arr[:,1])
+                        # store the coordinates as array blocks
+                        tBin["mx"].append(mPtsArr[:,0])
+                        tBin["my"].append(mPtsArr[:,1])
                 if proc2run == "motionSpread":
                     ##### [begin] process data-line for motionSpread -----
                     flagImgSav4Debug = False 
@@ -1103,7 +1149,7 @@ class ProcAntOS:
                     #   in a data-line (0.4-0.6s).
                     maxEInCluster = 4 
                     if flagImgSav4Debug:
-                        _ts = data[di][ci["Timestamp"]].strip()
+                        _ts = cols["ts"][di]
                         fn = "%s.jpg"%(_ts) # image filename to save
                     hmArr[:,:,:] = 0 # init image
                     # motion-points in previous data-line
@@ -1256,7 +1302,7 @@ class ProcAntOS:
                     
                     if flagImgSav4Debug:
                     # debugging
-                        _ts = data[di][ci["Timestamp"]].strip()
+                        _ts = cols["ts"][di]
                         fn = "%s.jpg"%(_ts) # image filename to save
                         debugImg = hmArr.copy().astype(np.uint8)
                         debugImg *= int(255/th4i)
@@ -2003,14 +2049,13 @@ class ProcAntOS:
             mm = int(np.std(pxx4draw))
             peaks, _ = find_peaks(pxx4draw, prominence=mm)
             pmLen = max(2, int(min(graphW, graphH)*0.01)) # peak marker len
+            pts = np.empty((3,1,2), np.int32) # peak marker; reused
             for peak in peaks:
                 ### draw peak marker
                 x = mg["l"] + round(fs[peak]/inputFS*2*graphW)
                 y = zeroY - round(pxx4draw[peak])
-                pts = np.array([[x, y], 
-                                [x-int(pmLen/2), y-pmLen],
-                                [x+int(pmLen/2), y-pmLen]], np.int32)
-                pts = pts.reshape((-1,1,2))
+                pts[:,0,0] = (x, x-int(pmLen/2), x+int(pmLen/2))
+                pts[:,0,1] = (y, y-pmLen, y-pmLen)
                 cv2.polylines(img, [pts], True, color["data"], 1)
                 ### draw its value
                 _txt = fsPeriod[round(fs[peak]/(inputFS/2)*graphW)]
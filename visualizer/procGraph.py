@@ -1017,16 +1017,27 @@ class ProcGraphData:
         # write title label
         cv2.putText(rsltImg, titleLbl, (10, legY), cvFont, 
                     fontScale=fScale, color=fCol, thickness=1)
+        ### level index of each pixel (-1: not in any range)
+        rngs = np.asarray(list(hmLvlRngs.values()))
+        if len(rngs) > 0 and np.all(rngs[1:,0] == rngs[:-1,1]) and \
+          np.all(rngs[:,0] <= rngs[:,1]):
+        # contiguous ranges; bin all pixels in one pass
+            edges = np.append(rngs[:,0], rngs[-1,1])
+            lvlIdx = np.digitize(hmArr, edges) - 1
+            lvlIdx[lvlIdx >= len(rngs)] = -1
+        else:
+            lvlIdx = np.full(hmArr.shape, -1, dtype=np.int64)
+            for i, (rng1, rng2) in enumerate(rngs):
+                lvlIdx[(hmArr >= rng1) & (hmArr < rng2)] = i
+        if ptRad == -1:
+            ### coloring heatmap; all ranges at once
+            cols = np.asarray([hmCols[key] for key in hmLvlRngs.keys()])
+            idx = lvlIdx >= 0
+            rsltImg[idx] = cols[lvlIdx[idx]]
         for i, key in enumerate(hmLvlRngs.keys()):
-            ### get indices of pixels for heatmap
-            rng1, rng2 = hmLvlRngs[key]
-            idx = np.logical_and(np.greater_equal(hmArr, rng1),
-                                 np.less(hmArr, rng2))
-            
             ### coloring heatmap
-            if ptRad == -1:
-                rsltImg[idx] = hmCols[key]
-            else:
+            if ptRad != -1:
+                idx = lvlIdx == i
                 ys, xs = np.where(idx)
                 for pti in range(len(xs)):
                     cv2.circle(rsltImg, (xs[pti], ys[pti]), ptRad, 